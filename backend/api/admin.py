@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Paper, ExtractedSkill
+from .models import Paper, ExtractedSkill, Author, ExtractionJob
 
 admin.site.register(Paper)
 admin.site.register(ExtractedSkill)
+admin.site.register(Author)
+admin.site.register(ExtractionJob)
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import subprocess
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from api.models import Paper
+from api.services.benchmark import (
+    HashingEncoder, Timer, git_revision, peak_rss_mb, rate,
+    synthetic_papers, synthetic_skills, synthetic_vocabulary,
+)
+from api.services.skill_extraction import chunked, SkillExtractor, ExtractedSkillWriter
+
+# options passed through to the per-size subprocess
+RUN_OPTIONS = ("skills", "encoder", "search", "top_k", "batch_size", "flush_every", "seed")
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ingestion and extraction hot paths on synthetic corpora and print JSON. "
+        "Each size runs in its own process against a throwaway SQLite file, so the configured "
+        "database is never touched and peak RSS is per size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=str,
+            default="1000,10000,100000",
+            help="Comma-separated corpus sizes (number of papers).",
+        )
+        parser.add_argument(
+            "--skills",
+            type=int,
+            default=14000,
+            help="Number of synthetic skills.",
+        )
+        parser.add_argument(
+            "--encoder",
+            type=str,
+            default="stub",
+            help="'stub' for the offline hashing encoder, or a SentenceTransformer model name.",
+        )
+        parser.add_argument(
+            "--search",
+            type=str,
+            default="exact",
+            help="Skill search backend to benchmark.",
+        )
+        parser.add_argument("--top-k", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--flush-every", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Also write the JSON report to this file.",
+        )
+        # set by the parent for the per-size subprocess: run one size against the (empty) database and print it
+        parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        if options["child"]:
+            if len(sizes) != 1:
+                raise CommandError("--child runs exactly one size")
+            self.stdout.write(json.dumps(self._run(sizes[0], options)))
+            return
+
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "encoder": options["encoder"],
+            "search": options["search"],
+            "skills": options["skills"],
+            "top_k": options["top_k"],
+            "batch_size": options["batch_size"],
+            "runs": [],
+        }
+        for size in sizes:
+            self.stderr.write(f"Benchmarking {size:,} papers...")
+            report["runs"].append(self._run_in_subprocess(size, options))
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options.get("output"):
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+
+    def _run_in_subprocess(self, size, options):
+        with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+            args = [sys.executable, "manage.py", "bench", "--child", "--sizes", str(size)]
+            for name in RUN_OPTIONS:
+                args += [f"--{name.replace('_', '-')}", str(options[name])]
+            # stderr (progress, errors) goes straight to ours
+            out = subprocess.run(
+                args, cwd=settings.BASE_DIR, env=dict(os.environ, SQLITE_PATH=os.path.join(tmp, "bench.sqlite3")),
+                stdout=subprocess.PIPE, text=True,
+            )
+        if out.returncode != 0:
+            raise CommandError(f"benchmark of {size:,} papers failed (exit code {out.returncode})")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def _run(self, size, options):
+        # a fresh file from _run_in_subprocess; refuse anything that already has tables
+        if connection.introspection.table_names():
+            raise CommandError(f"--child needs an empty throwaway database, not {settings.DATABASES['default']['NAME']}")
+        call_command("migrate", verbosity=0, interactive=False)
+
+        seed = options["seed"]
+        batch_size = options["batch_size"]
+        vocabulary = synthetic_vocabulary(seed=seed)
+        skills = synthetic_skills(options["skills"], vocabulary, seed=seed)
+        encoder = HashingEncoder() if options["encoder"] == "stub" else None
+        model_name = "bench-stub" if encoder is not None else options["encoder"]
+        run = {"papers": size}
+
+        with Timer() as t:
+            extractor = SkillExtractor(skill_list=skills, model_name=model_name, search=options["search"], model=encoder)
+        run["skill_embedding_seconds"] = round(t.seconds, 3)
+
+        with Timer() as t:
+            for chunk in chunked(synthetic_papers(size, vocabulary, seed=seed), 1000):
+                Paper.objects.bulk_create([Paper(**p) for p in chunk], batch_size=1000)
+        run["paper_insert_per_sec"] = rate(size, t.seconds)
+
+        papers = Paper.objects.order_by("id")
+        results = []
+        with Timer() as t:
+            for batch in chunked(papers.iterator(chunk_size=batch_size), batch_size):
+                results.extend(extractor.extract_batch(batch, top_k=options["top_k"], batch_size=batch_size, save_to_db=False))
+        run["extract_seconds"] = round(t.seconds, 3)
+        run["extract_papers_per_sec"] = rate(size, t.seconds)
+
+        writer = ExtractedSkillWriter(flush_every=options["flush_every"], update_profiles=False)
+        with Timer() as t:
+            with writer:
+                for chunk in chunked(results, options["flush_every"]):
+                    writer.add(chunk)
+        run["skill_rows_written"] = writer.written
+        run["skill_write_rows_per_sec"] = rate(writer.written, t.seconds)
+        # this process only ran this size, so its peak is the run's own
+        run["peak_rss_mb"] = peak_rss_mb()
+        return run
@@ -1,8 +1,17 @@
 import time
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from tqdm import tqdm
-from api.models import Paper, ExtractedSkill
-from api.services.skill_extraction import load_skill, SkillExtractor
+from api.models import Paper
+from api.services.skill_extraction import SkillExtractor, ExtractedSkillWriter
+from api.services.skill_taxonomy import SKILL_EMBEDDING_MODES, load_taxonomy
+from api.services.embedding_cache import SkillEmbeddingCache, PaperEmbeddingStore
+from api.services.pipeline import ExtractionPipeline
+from api.services.sharded_extraction import ensure_skill_cache, extract_sharded
+from api.services.skill_search import SEARCH_BACKENDS
+from api.services.model_backends import BACKENDS, model_tag, topk_agreement
+from api.services.ingest import normalize_author_name
+from api.services.extraction_runs import get_run, pending_papers, skills_fingerprint
+from api.services import metrics
 
 class Command(BaseCommand):
     help = "Extract skills from paper abstracts using a predefined skill list and save them to the DB."
@@ -29,7 +38,7 @@ class Command(BaseCommand):
         parser.add_argument(
             "--author", 
             type=str, 
-            help="Filter papers by a specific author name (case-insensitive contains)."
+            help="Filter papers by author full name (case- and whitespace-insensitive exact match)."
         )
         parser.add_argument(
             "--start-year", 
@@ -44,31 +53,131 @@ class Command(BaseCommand):
         parser.add_argument(
             "--overwrite",
             action="store_true",
-            help="Re-process papers that already have extracted skills.",
+            help="Re-process matching papers even if this configuration already did them with the same abstract.",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=64,
+            help="Number of abstracts encoded together in one model call.",
+        )
+        parser.add_argument(
+            "--flush-every",
+            type=int,
+            default=500,
+            help="Number of papers buffered before their skills are bulk-inserted in one transaction.",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Directory for cached skill embeddings (default: settings.SKILL_EMBEDDING_CACHE_DIR).",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always re-encode the skill list instead of using the embedding cache.",
+        )
+        parser.add_argument(
+            "--no-embedding-store",
+            action="store_true",
+            help="Do not read or save stored abstract embeddings; encode every abstract again.",
+        )
+        parser.add_argument(
+            "--search",
+            choices=SEARCH_BACKENDS,
+            default="exact",
+            help="Skill search backend: exact scan or an approximate HNSW index persisted in the cache dir.",
+        )
+        parser.add_argument(
+            "--min-confidence",
+            type=float,
+            help="Drop top-k skills whose cosine similarity is below this value.",
+        )
+        parser.add_argument(
+            "--recall-sample",
+            type=int,
+            default=200,
+            help="With an approximate --search, number of papers used to report recall against the exact search.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            default="torch",
+            help="Inference backend: full-precision torch, ONNX Runtime, or dynamically quantized int8. "
+                 "Non-torch results are stored under '<model>+<backend>'.",
+        )
+        parser.add_argument(
+            "--skill-embedding",
+            choices=SKILL_EMBEDDING_MODES,
+            default="label",
+            help="Encode each skill from its preferred label only, or as the mean of its label and alt-label embeddings.",
+        )
+        parser.add_argument(
+            "--check-agreement",
+            type=int,
+            default=0,
+            metavar="N",
+            help="With a non-torch --backend, compare top-k against the fp32 model on N papers before running.",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=4,
+            help="Batches buffered between the read, encode and write stages.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of extraction processes; papers are split into id-range shards, one per worker.",
+        )
+        metrics.add_instrumentation_arguments(parser)
 
     def handle(self, *args, **options):
+        with metrics.instrument_command(options.get("stats_json"), options.get("profile"), stdout=self.stdout):
+            self.extract(**options)
+
+    def extract(self, **options):
 
         skills_file = options["skills_file"]
         model_name = options["model"]
+        backend = options["backend"]
+        embedding_model = model_tag(model_name, backend)
         top_k = options["top_k"]
         author_filter = options.get("author")
         start_year = options.get("start_year")
         end_year = options.get("end_year")
         overwrite = options["overwrite"]
+        batch_size = max(1, options["batch_size"])
+        flush_every = max(1, options["flush_every"])
+        cache = None if options["no_cache"] else SkillEmbeddingCache(options.get("cache_dir"))
+        paper_store = None if options["no_embedding_store"] else PaperEmbeddingStore(embedding_model)
+        workers = max(1, options["workers"])
+        search = options["search"]
+        min_confidence = options.get("min_confidence")
+        skill_embedding = options["skill_embedding"]
+        if workers > 1 and cache is None:
+            raise CommandError("--workers shares the skill embedding cache between processes; drop --no-cache.")
 
         # Load Skill List
         self.stdout.write(self.style.NOTICE(f"Loading skills from '{skills_file}'..."))
         try:
-            skill_list = load_skill(skills_file)
+            skill_list = load_taxonomy(skills_file, alt_labels=skill_embedding == "mean")
         except (FileNotFoundError, ValueError) as e:
             self.stdout.write(self.style.ERROR(f"Error loading skills file: {e}"))
             return
         
-        # Create SkillExtractor
-        self.stdout.write(self.style.NOTICE(f"Initializing model '{model_name}' and creating embeddings..."))
+        # Create SkillExtractor (with --workers each worker builds its own from the shared cache)
+        self.stdout.write(self.style.NOTICE(f"Initializing model '{embedding_model}' and creating embeddings..."))
         start_time = time.time()
-        extractor = SkillExtractor(skill_list=skill_list, model_name=model_name)
+        extractor = None
+        if workers > 1:
+            ensure_skill_cache(cache, model_name, skill_list, skills_file, search=search, backend=backend, skill_embedding=skill_embedding)
+        else:
+            extractor = SkillExtractor(
+                skill_list=skill_list, model_name=model_name, skills_file=skills_file, cache=cache,
+                paper_store=paper_store, search=search, backend=backend, skill_embedding=skill_embedding,
+            )
         end_time = time.time()
         self.stdout.write(f"Initialization took {end_time - start_time:.2f} seconds.")
 
@@ -78,7 +187,7 @@ class Command(BaseCommand):
 
         # filter
         if author_filter:
-            papers = papers.filter(authors__icontains=author_filter)
+            papers = papers.filter(authorships__author__name_key=normalize_author_name(author_filter))
             self.stdout.write(f"   - Filtering by author: {author_filter}")
         if start_year:
             papers = papers.filter(year__gte=start_year)
@@ -87,10 +196,20 @@ class Command(BaseCommand):
             papers = papers.filter(year__lte=end_year)
             self.stdout.write(f"   - Filtering up to year: {end_year}")
             
-        # if not overwrite, skip paper
+        # the run is this exact configuration: model, skill file contents, top-k and thresholds
+        run = get_run(
+            embedding_model, skills_fingerprint(skills_file), top_k,
+            min_confidence=min_confidence, search=search, skill_embedding=skill_embedding,
+        )
+        self.stdout.write(f"   - Extraction run {run.id} (config {run.config_hash[:12]})")
+
+        # if not overwrite, skip papers this run already did whose abstract is unchanged
         if not overwrite:
-            papers = papers.exclude(extracted_skills__embedding_model=model_name)
-            self.stdout.write(self.style.WARNING("   - Skipping papers already processed by this model. Use --overwrite to re-process."))
+            papers = pending_papers(papers, run)
+            self.stdout.write(self.style.WARNING(
+                "   - Skipping papers already processed with this configuration and unchanged abstract. "
+                "Use --overwrite to re-process."
+            ))
 
         total_papers = papers.count()
         if total_papers == 0:
@@ -99,18 +218,81 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f"📚 Found {total_papers} papers to process."))
 
+        if backend != "torch" and options["check_agreement"] > 0:
+            sample = [p.abstract for p in papers[:options["check_agreement"]]]
+            reference = SkillExtractor(
+                skill_list=skill_list, model_name=model_name, skills_file=skills_file, cache=cache, skill_embedding=skill_embedding
+            )
+            candidate = extractor or SkillExtractor(
+                skill_list=skill_list, model_name=model_name, skills_file=skills_file, cache=cache, backend=backend,
+                skill_embedding=skill_embedding,
+            )
+            agreement = topk_agreement(reference, candidate, sample, top_k=top_k)
+            self.stdout.write(f"   - {backend} vs fp32 top-{top_k} agreement on {len(sample)} papers: {agreement:.3f}")
+            del reference
+
+        if search != "exact" and extractor is not None and options["recall_sample"] > 0:
+            sample = list(papers[:options["recall_sample"]])
+            recall = extractor.search_recall(sample, top_k=top_k)
+            self.stdout.write(f"   - {search} recall@{top_k} vs exact on {len(sample)} papers: {recall:.3f}")
+
         # process and save
+        # the writer replaces old rows of this model for every processed paper and marks it done for the run
         processed_count = 0
-        with tqdm(total=total_papers, desc="Extracting Skills", unit="paper", dynamic_ncols=True) as pbar:
-            # .iterator() for  memory save
-            for paper in papers.iterator():
-                extractor.extract_from_text(
-                    paper=paper,
-                    author_name=author_filter, # save author from filter
+        extract_started = time.perf_counter()
+        writer = ExtractedSkillWriter(flush_every=flush_every, run=run)
+        with writer, tqdm(total=total_papers, desc="Extracting Skills", unit="paper", dynamic_ncols=True) as pbar:
+            if workers > 1:
+                self.stdout.write(f"   - Running {workers} worker processes")
+                processed_count = extract_sharded(
+                    papers,
+                    workers,
+                    {
+                        "skills_file": skills_file,
+                        "model_name": model_name,
+                        "embedding_model": embedding_model,
+                        "backend": backend,
+                        "cache_dir": cache.cache_dir,
+                        "use_store": paper_store is not None,
+                        "author_name": author_filter,
+                        "top_k": top_k,
+                        "batch_size": batch_size,
+                        "search": search,
+                        "min_confidence": min_confidence,
+                        "skill_embedding": skill_embedding,
+                    },
+                    writer,
+                    paper_store=paper_store,
+                    progress=pbar,
+                )
+            else:
+                # DB reads, model inference and DB writes overlap in a three-stage pipeline
+                pipeline = ExtractionPipeline(
+                    extractor,
+                    writer,
+                    batch_size=batch_size,
+                    queue_size=max(1, options["queue_size"]),
                     top_k=top_k,
-                    save_to_db=True
+                    author_name=author_filter, # save author from filter
+                    min_confidence=min_confidence,
+                    progress=pbar,
                 )
-                processed_count += 1
-                pbar.update(1)
+                processed_count = pipeline.run(papers)
 
-        self.stdout.write(self.style.SUCCESS(f"\nSuccessfully processed {processed_count} papers and saved skills to the database."))
\ No newline at end of file
+        elapsed = time.perf_counter() - extract_started
+        if elapsed > 0:
+            metrics.set_gauge("extraction_papers_per_second", round(processed_count / elapsed, 2), model=embedding_model)
+        if workers == 1:
+            for stage in pipeline.report():
+                self.stdout.write(
+                    f"   - {stage['stage']:<6} {stage['items']} papers, busy {stage['busy_seconds']}s "
+                    f"({stage['items_per_sec']} papers/s), waiting {stage['waiting_seconds']}s, "
+                    f"utilization {stage['utilization']}"
+                )
+        if paper_store is not None:
+            stats = paper_store.stats()
+            self.stdout.write(
+                f"Abstract embeddings: {stats['hits']} reused, {stats['misses']} encoded "
+                f"({stats['stale']} re-encoded because the abstract changed)."
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nSuccessfully processed {processed_count} papers and saved {writer.written} skills to the database."))
\ No newline at end of file
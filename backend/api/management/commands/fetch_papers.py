@@ -2,12 +2,17 @@
 For Development Only Na!!!
 """
 
-import requests
 import time
 from tqdm import tqdm
 from difflib import SequenceMatcher
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from api.models import Paper
+from django.db import transaction
+from api.services.crossref import CROSSREF_SELECT, CrossRefClient, CrossRefError
+from api.services.semantic_scholar import S2_API_URL, SemanticScholarClient
+from api.services.http_cache import ResponseCache
+from api.services.ingest import save_papers, start_ingest_job, already_enriched, checkpoint_ingest_job
+from api.services import metrics
 
 
 #def similar(a, b):
@@ -23,8 +28,28 @@ class Command(BaseCommand):
         parser.add_argument("--query", type=str, help="Keyword or topic to search")
         parser.add_argument("--start", type=int, help="Start year")
         parser.add_argument("--end", type=int, help="End year")
+        parser.add_argument("--select", type=str, default=CROSSREF_SELECT,
+                            help="Comma-separated CrossRef fields to return (empty string for full records)")
+        parser.add_argument("--rows", type=int, default=1000, help="CrossRef rows per page (max 1000)")
+        parser.add_argument("--mailto", type=str, help="Contact e-mail sent to CrossRef for the polite pool")
+        parser.add_argument("--update-existing", action="store_true",
+                            help="Refresh citation count, abstract and fields of study of papers already in the DB")
+        parser.add_argument("--resume", action="store_true",
+                            help="Continue the previous run with the same query from its last saved CrossRef cursor")
+        parser.add_argument("--cache-dir", type=str, help="Semantic Scholar response cache directory (default: settings.HTTP_CACHE_DIR); CrossRef pages are never cached")
+        parser.add_argument("--cache-ttl", type=float, help="Hours a cached response stays valid (default: settings.HTTP_CACHE_TTL)")
+        parser.add_argument("--no-cache", action="store_true", help="Always hit Semantic Scholar")
+        parser.add_argument("--s2-url", type=str, default=S2_API_URL, help="Semantic Scholar Graph API base URL")
+        parser.add_argument("--s2-api-key", type=str, help="Semantic Scholar API key (raises the rate limit)")
+        parser.add_argument("--s2-rate", type=float, default=1.0, help="Semantic Scholar requests per second")
+        parser.add_argument("--s2-concurrency", type=int, default=4, help="Concurrent Semantic Scholar batch requests")
+        metrics.add_instrumentation_arguments(parser)
 
     def handle(self, *args, **options):
+        with metrics.instrument_command(options.get("stats_json"), options.get("profile"), stdout=self.stdout):
+            self.fetch(**options)
+
+    def fetch(self, **options):
         author = options.get("author")
         query = options.get("query")
         start_year = options.get("start")
@@ -35,14 +60,32 @@ class Command(BaseCommand):
             return
 
         target_author = author.lower().strip() if author else None
-        url = "https://api.crossref.org/works"
-        rows_per_page = 1000
-        offset = 0
+        cache = None
+        if not options["no_cache"]:
+            ttl = options["cache_ttl"] * 3600 if options.get("cache_ttl") is not None else settings.HTTP_CACHE_TTL
+            cache = ResponseCache(
+                str(options.get("cache_dir") or settings.HTTP_CACHE_DIR),
+                ttl=ttl,
+                max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+            )
+        s2 = SemanticScholarClient(
+            base_url=options["s2_url"],
+            api_key=options.get("s2_api_key"),
+            rate=options["s2_rate"],
+            concurrency=options["s2_concurrency"],
+            cache=cache,
+        )
+        crossref = CrossRefClient(
+            rows=min(options["rows"], 1000),
+            select=options["select"] or None,
+            mailto=options.get("mailto"),
+        )
         saved_count = 0
+        updated_count = 0
+        fetch_started = time.perf_counter()
 
         # Query setup
         base_params = {
-            "rows": rows_per_page,
             "filter": f"from-pub-date:{start_year},until-pub-date:{end_year}"
                       if start_year and end_year else None,
         }
@@ -55,36 +98,68 @@ class Command(BaseCommand):
 
         base_params = {k: v for k, v in base_params.items() if v is not None}
 
-        # First API call to get total
-        first_resp = requests.get(url, params={**base_params, "offset": 0})
-        if first_resp.status_code != 200:
-            self.stdout.write(self.style.ERROR(f"CrossRef API error ({first_resp.status_code})"))
-            return
-
-        total_results = first_resp.json().get("message", {}).get("total-results", 0)
+        # the job row checkpoints cursor and enriched DOIs after every page, so --resume can pick up there
+        job = start_ingest_job(
+            {
+                "author": author,
+                "query": query,
+                "start": start_year,
+                "end": end_year,
+                "select": options["select"],
+                "rows": crossref.rows,
+            },
+            resume=options["resume"],
+        )
+        if options["resume"]:
+            if job.status == "completed":
+                self.stdout.write(self.style.WARNING(f"Job {job.id} for this query already completed."))
+                return
+            if job.cursor != "*":
+                self.stdout.write(self.style.NOTICE(
+                    f"↪️ Resuming job {job.id} after {job.pages_done} pages ({job.items_seen} papers seen)"
+                ))
+
+        # cursor deep paging (no 10k offset cap); the next page is fetched while this one is saved
+        pages = crossref.iter_pages(base_params, cursor=job.cursor)
+        try:
+            _, first_page = next(pages, (None, None))
+        except CrossRefError as e:
+            if job.cursor == "*":
+                self.stdout.write(self.style.ERROR(str(e)))
+                return
+            # CrossRef cursors expire after a few minutes idle: page again from the start, but the
+            # DOIs recorded on the job are not sent to Semantic Scholar a second time
+            self.stdout.write(self.style.WARNING(f"Saved cursor rejected ({e}); paging again from the start."))
+            job.items_seen = 0
+            pages = crossref.iter_pages(base_params)
+            try:
+                _, first_page = next(pages, (None, None))
+            except CrossRefError as e:
+                self.stdout.write(self.style.ERROR(str(e)))
+                return
+
+        total_results = first_page.get("total-results", 0) if first_page else 0
         if total_results == 0:
-            self.stdout.write(self.style.WARNING("No papers found."))
+            if job.pages_done:
+                job.status = "completed"
+                job.save(update_fields=["status", "updated_at"])
+                self.stdout.write(self.style.SUCCESS("Nothing left to fetch for this job."))
+            else:
+                self.stdout.write(self.style.WARNING("No papers found."))
             return
 
+        job.total_results = total_results
+        job.save(update_fields=["total_results", "updated_at"])
         self.stdout.write(self.style.NOTICE(f"📚 Total available papers: {total_results}"))
-        time.sleep(1)
 
         # Progress bar
-        with tqdm(total=total_results, desc="Fetching papers", unit="paper", dynamic_ncols=True) as pbar:
-            while True:
-                params = base_params.copy()
-                params["offset"] = offset
-
-                response = requests.get(url, params=params)
-                if response.status_code != 200:
-                    self.stdout.write(self.style.ERROR(f"CrossRef API error: {response.status_code}"))
-                    break
-
-                data = response.json().get("message", {})
+        with tqdm(total=total_results, initial=min(job.items_seen, total_results), desc="Fetching papers", unit="paper", dynamic_ncols=True) as pbar:
+            data = first_page
+            while data is not None:
                 items = data.get("items", [])
-                if not items:
-                    break
 
+                # parse the page first, then enrich all its DOIs in batch requests
+                records = []
                 for item in items:
                     doi = item.get("DOI")
                     title = " ".join(item.get("title", [])) or "(No Title)"
@@ -119,48 +194,61 @@ class Command(BaseCommand):
                         pbar.update(1)
                         continue
 
-                    venue = item.get("container-title", [None])[0]
-                    url_link = item.get("URL")
-
-                    pbar.set_postfix_str(f"Now: {title[:60]}...", refresh=True)
-
-                    # Semantic Scholar enrichment
-                    abstract, fields_of_study, citation_count = None, None, 0
+                    records.append({
+                        "doi": doi,
+                        "title": title,
+                        "authors": ", ".join(authors),
+                        "year": year,
+                        "venue": (item.get("container-title") or [None])[0],
+                        "url": item.get("URL"),
+                        "abstract": None,
+                        "fields_of_study": None,
+                        "citation_count": 0,
+                    })
+
+                # Semantic Scholar enrichment (skipping DOIs this job already enriched before a restart)
+                pbar.set_postfix_str(f"Enriching {len(records)} papers...", refresh=True)
+                page_dois = [r["doi"] for r in records if r["doi"]]
+                done = already_enriched(job, page_dois)
+                to_enrich = [doi for doi in page_dois if doi not in done]
+                enrichment = s2.enrich(to_enrich)
+
+                for record in records:
+                    doi = record["doi"]
                     if doi:
-                        s2_url = f"https://api.semanticscholar.org/graph/v1/paper/DOI:{doi}"
-                        s2_params = {"fields": "title,abstract,fieldsOfStudy,citationCount"}
-                        s2_resp = requests.get(s2_url, params=s2_params)
-                        if s2_resp.status_code == 200:
-                            s2_data = s2_resp.json()
-                            abstract = s2_data.get("abstract")
-                            fields_of_study = ",".join(s2_data.get("fieldsOfStudy", []) or [])
-                            citation_count = s2_data.get("citationCount", 0)
-
-                    # Save to DB
-                    paper, created = Paper.objects.get_or_create(
-                        doi=doi,
-                        defaults={
-                            "title": title,
-                            "authors": ", ".join(authors),
-                            "year": year,
-                            "venue": venue,
-                            "url": url_link,
-                            "abstract": abstract,
-                            "fields_of_study": fields_of_study,
-                            "citation_count": citation_count,
-                        },
-                    )
-                    
-                    if created:
-                        saved_count += 1
-
-                    pbar.update(1)
-
-                offset += rows_per_page
-
-                if offset >= total_results:
+                        record.update(enrichment.get(doi.lower(), {}))
+
+                # Save to DB: one transaction and a handful of bulk queries per page, checkpoint included
+                with transaction.atomic():
+                    created, updated = save_papers(records, update_existing=options["update_existing"])
+                    enriched = [doi for doi in to_enrich if doi not in s2.last_failed]
+                    checkpoint_ingest_job(job, data.get("next-cursor"), len(items), created, enriched)
+                saved_count += created
+                updated_count += updated
+                pbar.update(len(records))
+                if records:
+                    pbar.set_postfix_str(f"Now: {records[-1]['title'][:60]}...", refresh=True)
+
+                try:
+                    _, data = next(pages, (None, None))
+                except CrossRefError as e:
+                    self.stdout.write(self.style.ERROR(f"{e} (run again with --resume to continue)"))
+                    job.status = "failed"
+                    job.save(update_fields=["status", "updated_at"])
                     break
-
-                time.sleep(1)
-
+            else:
+                job.status = "completed"
+                job.save(update_fields=["status", "updated_at"])
+
+        elapsed = time.perf_counter() - fetch_started
+        if elapsed > 0:
+            metrics.set_gauge("ingest_papers_per_second", round((saved_count + updated_count) / elapsed, 2))
+        if cache is not None:
+            stats = cache.stats()
+            self.stdout.write(f"HTTP cache: {stats['hits']} hits, {stats['misses']} misses ({cache.path})")
+            cache.close()  # writes the batched access times of this run's hits
+        if s2.failed_batches:
+            self.stdout.write(self.style.WARNING(f"Semantic Scholar: {s2.failed_batches} batch request(s) failed after retries"))
         self.stdout.write(self.style.SUCCESS(f"\n✅ Total papers saved to DB: {saved_count}"))
+        if options["update_existing"]:
+            self.stdout.write(self.style.SUCCESS(f"🔄 Existing papers updated: {updated_count}"))
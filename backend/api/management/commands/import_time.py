@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import subprocess
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# modules whose presence at startup means the ML stack was imported eagerly
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "pandas", "numpy")
+
+SETUP = "import django; django.setup(); "
+
+TARGETS = {
+    "manage.py check": ["manage.py", "check"],
+    "wsgi app": ["-c", "from backend.wsgi import application"],
+    "extract_skills command": ["-c", SETUP + "import api.management.commands.extract_skills"],
+    "api views": ["-c", SETUP + "import api.views"],
+    # what every process used to pay before the services layer imported these lazily
+    "eager ML stack": ["-c", "import numpy, pandas, sentence_transformers"],
+}
+
+
+def parse_importtime(stderr):
+    """Cumulative microseconds per module and total of the top-level imports, from `python -X importtime`."""
+    cumulative, total = {}, 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # the header line
+        name = parts[2][1:]  # nested imports are indented by two spaces per level
+        cumulative[name.strip()] = int(parts[1])
+        if not name.startswith(" "):
+            total += int(parts[1])
+    return cumulative, total
+
+
+def measure(args, repeat):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "backend.settings"))
+    runs, heavy = [], {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+        wall = time.perf_counter() - started
+        cumulative, total = parse_importtime(out.stderr)
+        runs.append((wall, total / 1e6))
+        heavy = {name: round(cumulative[name] / 1e6, 3) for name in HEAVY_MODULES if name in cumulative}
+    wall, imports = min(runs)
+    return {"wall_seconds": round(wall, 3), "import_seconds": round(imports, 3), "heavy_modules": heavy}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold-start import time of manage.py, the WSGI app and the extraction command "
+        "in fresh interpreters (python -X importtime), and list which heavy ML modules each one loads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per target; the fastest one is reported.",
+        )
+        parser.add_argument(
+            "--only",
+            type=str,
+            help=f"Comma-separated subset of targets: {', '.join(TARGETS)}.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        names = list(TARGETS)
+        if options.get("only"):
+            names = [n.strip() for n in options["only"].split(",") if n.strip()]
+            unknown = [n for n in names if n not in TARGETS]
+            if unknown:
+                raise CommandError(f"unknown targets: {', '.join(unknown)}")
+
+        results = {name: measure(TARGETS[name], max(1, options["repeat"])) for name in names}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, result in results.items():
+            if "error" in result:
+                self.stdout.write(self.style.WARNING(f"{name:<24} failed: {result['error']}"))
+                continue
+            heavy = ", ".join(f"{m} {s:.2f}s" for m, s in result["heavy_modules"].items()) or "none"
+            self.stdout.write(
+                f"{name:<24} wall {result['wall_seconds']:>7.3f}s  imports {result['import_seconds']:>7.3f}s  "
+                f"heavy modules: {heavy}"
+            )
@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+from api.models import Author
+from api.services.response_cache import bump_data_version
+from api.services.skill_profiles import refresh_author_profiles
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed AuthorSkillProfile table from ExtractedSkill rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            type=str,
+            help="Only rebuild profiles of this embedding model.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of authors aggregated per query.",
+        )
+
+    def handle(self, *args, **options):
+        model_name = options.get("model")
+        batch_size = max(1, options["batch_size"])
+        models = [model_name] if model_name else None
+
+        start_time = time.time()
+        author_ids = list(Author.objects.order_by("id").values_list("id", flat=True))
+        written = 0
+        with tqdm(total=len(author_ids), desc="Rebuilding profiles", unit="author", dynamic_ncols=True) as pbar:
+            for i in range(0, len(author_ids), batch_size):
+                # each chunk's old rows are deleted and rewritten in one transaction, so readers never see it empty
+                chunk = author_ids[i:i + batch_size]
+                written += refresh_author_profiles(chunk, models=models, db_batch_size=batch_size)
+                pbar.update(len(chunk))
+        bump_data_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} profile rows for {len(author_ids)} authors in {time.time() - start_time:.2f} seconds."
+        ))
@@ -0,0 +1,95 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.services.embedding_cache import PaperEmbeddingStore
+from api.services.extraction_jobs import claim_job, release_jobs, requeue_stale_jobs, run_job, worker_name
+from api.services.extractor_service import get_extractor
+
+class Command(BaseCommand):
+    help = (
+        "Run queued ExtractionJob rows with one warm SkillExtractor (configured by settings.SKILL_EXTRACTION). "
+        "The database is the queue: start as many workers as you like."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of polling.",
+        )
+        parser.add_argument(
+            "--requeue-stale",
+            type=int,
+            default=3600,
+            metavar="SECONDS",
+            help="Put running jobs whose worker has not saved progress for this long back in the queue (0 to disable). "
+                 "Checked on start and whenever the queue is empty.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=64,
+            help="Number of abstracts encoded together.",
+        )
+        parser.add_argument(
+            "--flush-every",
+            type=int,
+            default=500,
+            help="Number of papers buffered before a bulk insert.",
+        )
+        parser.add_argument(
+            "--no-embedding-store",
+            action="store_true",
+            help="Don't reuse or store per-paper abstract embeddings.",
+        )
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.requeue_stale(options["requeue_stale"])
+
+        start_time = time.time()
+        extractor = get_extractor()
+        if not options["no_embedding_store"]:
+            extractor.paper_store = PaperEmbeddingStore(extractor.model_name)
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker} ready with '{extractor.model_name}' in {time.time() - start_time:.2f} seconds."
+        ))
+
+        try:
+            while True:
+                close_old_connections()
+                job = claim_job(worker)
+                if job is None:
+                    if self.requeue_stale(options["requeue_stale"]):
+                        continue
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                job = run_job(
+                    job, extractor,
+                    batch_size=max(1, options["batch_size"]),
+                    flush_every=max(1, options["flush_every"]),
+                )
+                style = self.style.SUCCESS if job.status == "completed" else self.style.ERROR
+                self.stdout.write(style(
+                    f"Job {job.id} ({job.kind}) {job.status}: {job.processed_papers}/{job.total_papers} papers, "
+                    f"{job.skills_written} skills in {job.run_seconds:.2f}s {job.error}".rstrip()
+                ))
+        except KeyboardInterrupt:
+            released = release_jobs(worker)
+            self.stdout.write(self.style.WARNING(f"Stopping worker; {released} unfinished job(s) put back in the queue."))
+
+    def requeue_stale(self, older_than):
+        if older_than <= 0:
+            return 0
+        requeued = requeue_stale_jobs(older_than)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)."))
+        return requeued
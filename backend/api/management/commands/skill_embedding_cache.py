@@ -0,0 +1,100 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.services.skill_extraction import SkillExtractor
+from api.services.skill_taxonomy import SKILL_EMBEDDING_MODES, load_taxonomy
+from api.services.embedding_cache import SkillEmbeddingCache
+from api.services.skill_search import SEARCH_BACKENDS
+from api.services.model_backends import BACKENDS, model_tag
+
+class Command(BaseCommand):
+    help = "Prebuild, list or invalidate the on-disk cache of skill embeddings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["build", "list", "clear"],
+            help="build: encode a skill file into the cache, list: show entries, clear: invalidate entries.",
+        )
+        parser.add_argument(
+            "skills_file",
+            nargs="?",
+            type=str,
+            help="Path to the skill dataset file (CSV or JSON). Required for build; limits clear to this file and model.",
+        )
+        parser.add_argument(
+            "--model",
+            type=str,
+            default="all-MiniLM-L6-v2",
+            help="Name of the SentenceTransformer model to use.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            default="torch",
+            help="Inference backend whose embeddings are cached (each backend has its own entry).",
+        )
+        parser.add_argument(
+            "--skill-embedding",
+            choices=SKILL_EMBEDDING_MODES,
+            default="label",
+            help="Cache label embeddings or label+alt-label mean embeddings (each mode has its own entry).",
+        )
+        parser.add_argument(
+            "--search",
+            choices=SEARCH_BACKENDS,
+            default="exact",
+            help="Also build and persist the index for this search backend.",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            type=str,
+            help="Directory for cached skill embeddings (default: settings.SKILL_EMBEDDING_CACHE_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        skills_file = options.get("skills_file")
+        model_name = options["model"]
+        skill_embedding = options["skill_embedding"]
+        cache = SkillEmbeddingCache(options.get("cache_dir"))
+
+        if action == "list":
+            entries = cache.entries()
+            if not entries:
+                self.stdout.write(self.style.WARNING(f"No cached skill embeddings in {cache.cache_dir}"))
+            for entry in entries:
+                self.stdout.write(f"{entry['key']}  {entry.get('model')}  {entry['shape']}  {entry.get('skills_file')}")
+            return
+
+        if action == "clear":
+            key = None
+            if skills_file:
+                key = cache.key(
+                    model_tag(model_name, options["backend"]), self._load(skills_file, skill_embedding), skills_file,
+                    mode=skill_embedding,
+                )
+            removed = cache.clear(key)
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} cache file(s) from {cache.cache_dir}"))
+            return
+
+        if not skills_file:
+            raise CommandError("build needs a skills_file")
+        skill_list = self._load(skills_file, skill_embedding)
+        start_time = time.time()
+        SkillExtractor(
+            skill_list=skill_list, model_name=model_name, skills_file=skills_file, cache=cache,
+            search=options["search"], backend=options["backend"], skill_embedding=skill_embedding,
+        )
+        stats = cache.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Cache ready in {time.time() - start_time:.2f} seconds "
+                f"({stats['hits']} hit, {stats['misses']} miss)."
+            )
+        )
+
+    def _load(self, skills_file, skill_embedding):
+        try:
+            return load_taxonomy(skills_file, alt_labels=skill_embedding == "mean")
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(f"Error loading skills file: {e}")
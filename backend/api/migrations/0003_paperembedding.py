@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_extractedskill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('embedding_model', models.CharField(max_length=255)),
+                ('abstract_hash', models.CharField(max_length=64)),
+                ('dim', models.IntegerField()),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embeddings', to='api.paper')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('paper', 'embedding_model'), name='unique_paper_embedding_per_model')],
+            },
+        ),
+    ]
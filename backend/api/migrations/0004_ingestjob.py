@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_paperembedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('params_hash', models.CharField(max_length=64, unique=True)),
+                ('params', models.JSONField()),
+                ('cursor', models.TextField(default='*')),
+                ('pages_done', models.IntegerField(default=0)),
+                ('items_seen', models.IntegerField(default=0)),
+                ('saved_count', models.IntegerField(default=0)),
+                ('total_results', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IngestJobDoi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doi', models.CharField(max_length=255)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enriched_dois', to='api.ingestjob')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'doi'), name='unique_enriched_doi_per_job')],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_authors(apps, schema_editor):
+    Paper = apps.get_model('api', 'Paper')
+    Author = apps.get_model('api', 'Author')
+    PaperAuthor = apps.get_model('api', 'PaperAuthor')
+
+    def flush(chunk):
+        names = {}
+        for _, authors in chunk:
+            for name in authors:
+                names.setdefault(" ".join(name.split()).lower(), name)
+        Author.objects.bulk_create(
+            [Author(name=name, name_key=key) for key, name in names.items()],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        ids = {}
+        keys = list(names)
+        for i in range(0, len(keys), 500):
+            ids.update(Author.objects.filter(name_key__in=keys[i:i + 500]).values_list('name_key', 'id'))
+        links = []
+        for paper_id, authors in chunk:
+            seen = set()
+            for position, name in enumerate(authors):
+                author_id = ids[" ".join(name.split()).lower()]
+                if author_id not in seen:
+                    seen.add(author_id)
+                    links.append(PaperAuthor(paper_id=paper_id, author_id=author_id, position=position))
+        PaperAuthor.objects.bulk_create(links, batch_size=500, ignore_conflicts=True)
+
+    chunk = []
+    for paper_id, authors in Paper.objects.values_list('id', 'authors').iterator(chunk_size=2000):
+        names = [a.strip() for a in (authors or '').split(',') if a.strip()]
+        if names:
+            chunk.append((paper_id, names))
+        if len(chunk) >= 2000:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_ingestjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paper',
+            name='year',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('name_key', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaperAuthor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='authorships', to='api.author')),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='authorships', to='api.paper')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('paper', 'author'), name='unique_paper_author')],
+                'indexes': [models.Index(fields=['author', 'paper'], name='paperauthor_author_paper_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='extractedskill',
+            index=models.Index(fields=['embedding_model', 'paper'], name='skill_model_paper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='extractedskill',
+            index=models.Index(fields=['skill_name'], name='skill_name_idx'),
+        ),
+        migrations.RunPython(backfill_authors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_author_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorSkillProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('embedding_model', models.CharField(max_length=255)),
+                ('skill_name', models.CharField(max_length=255)),
+                ('paper_count', models.IntegerField(default=0)),
+                ('mean_confidence', models.FloatField(default=0.0)),
+                ('max_confidence', models.FloatField(default=0.0)),
+                ('first_year', models.IntegerField(blank=True, null=True)),
+                ('last_year', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_profiles', to='api.author')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('author', 'embedding_model', 'skill_name'), name='unique_author_skill_profile')],
+                'indexes': [models.Index(fields=['author', 'embedding_model', '-paper_count'], name='profile_author_model_count_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_authorskillprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('paper', 'Paper'), ('author', 'Author'), ('years', 'Year range')], max_length=20)),
+                ('start_year', models.IntegerField(blank=True, null=True)),
+                ('end_year', models.IntegerField(blank=True, null=True)),
+                ('top_k', models.IntegerField(default=5)),
+                ('overwrite', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('worker', models.CharField(blank=True, default='', max_length=255)),
+                ('embedding_model', models.CharField(blank=True, default='', max_length=255)),
+                ('total_papers', models.IntegerField(default=0)),
+                ('processed_papers', models.IntegerField(default=0)),
+                ('skills_written', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run_seconds', models.FloatField(blank=True, null=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='extraction_jobs', to='api.author')),
+                ('paper', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='extraction_jobs', to='api.paper')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='extractionjob_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+import hashlib
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_abstract_hash(apps, schema_editor):
+    Paper = apps.get_model('api', 'Paper')
+
+    chunk = []
+    for paper_id, abstract in Paper.objects.values_list('id', 'abstract').iterator(chunk_size=2000):
+        digest = hashlib.sha1((abstract or '').encode('utf-8')).hexdigest()
+        chunk.append(Paper(id=paper_id, abstract_hash=digest))
+        if len(chunk) >= 2000:
+            Paper.objects.bulk_update(chunk, ['abstract_hash'], batch_size=500)
+            chunk = []
+    if chunk:
+        Paper.objects.bulk_update(chunk, ['abstract_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_extractionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paper',
+            name='abstract_hash',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.RunPython(backfill_abstract_hash, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ExtractionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('config_hash', models.CharField(max_length=64, unique=True)),
+                ('embedding_model', models.CharField(max_length=255)),
+                ('skills_hash', models.CharField(max_length=64)),
+                ('top_k', models.IntegerField()),
+                ('min_confidence', models.FloatField(blank=True, null=True)),
+                ('search', models.CharField(default='exact', max_length=20)),
+                ('skill_embedding', models.CharField(default='label', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExtractedPaper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('abstract_hash', models.CharField(max_length=40)),
+                ('processed_at', models.DateTimeField(auto_now=True)),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extraction_markers', to='api.paper')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='papers', to='api.extractionrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('run', 'paper'), name='unique_run_paper')],
+            },
+        ),
+    ]
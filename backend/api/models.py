@@ -1,20 +1,60 @@
+import hashlib
 from django.db import models
 
+
+def abstract_hash(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
 class Paper(models.Model):
     title = models.TextField()
     authors = models.TextField()
-    year = models.IntegerField(null=True, blank=True)
+    year = models.IntegerField(null=True, blank=True, db_index=True)
     doi = models.CharField(max_length=255, unique=True)
     venue = models.CharField(max_length=255, null=True, blank=True)
     abstract = models.TextField(null=True, blank=True)
     fields_of_study = models.TextField(null=True, blank=True)
     citation_count = models.IntegerField(default=0)
     url = models.URLField(null=True, blank=True)
+    abstract_hash = models.CharField(max_length=40, blank=True, default='')  # sha1 of abstract, compared by incremental extraction
+
+    def save(self, *args, **kwargs):
+        # bulk paths (save_papers) set the hash themselves
+        self.abstract_hash = abstract_hash(self.abstract)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'abstract' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'abstract_hash'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'authors' in update_fields:
+            # keep the indexed author lookup in step with the authors text
+            from api.services.ingest import relink_paper_authors
+
+            relink_paper_authors(self)
     
     # When print pr see it in Django admin
     def __str__(self):
         return f"({self.id}) {self.title} ({self.year})"
 
+class Author(models.Model):
+    name = models.CharField(max_length=255)
+    name_key = models.CharField(max_length=255, unique=True)  # lowercased, whitespace-collapsed name used for lookups
+
+    def __str__(self):
+        return self.name
+
+class PaperAuthor(models.Model):
+    paper = models.ForeignKey('Paper', on_delete=models.CASCADE, related_name='authorships')
+    author = models.ForeignKey('Author', on_delete=models.CASCADE, related_name='authorships')
+    position = models.IntegerField(default=0)  # order in the paper's author list
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['paper', 'author'], name='unique_paper_author'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'paper'], name='paperauthor_author_paper_idx'),
+        ]
+
 class ExtractedSkill(models.Model):
     paper = models.ForeignKey('Paper', on_delete=models.CASCADE, related_name='extracted_skills')
     author_name = models.CharField(max_length=255, null=True, blank=True)
@@ -24,5 +64,152 @@ class ExtractedSkill(models.Model):
     embedding_model = models.CharField(max_length=255, default="SBERT-all-mpnet-base-v2")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['embedding_model', 'paper'], name='skill_model_paper_idx'),
+            models.Index(fields=['skill_name'], name='skill_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.skill_name} ({self.confidence:.2f}) - {self.author_name or 'Unknown'} [{self.paper.title}]"
+
+class PaperEmbedding(models.Model):
+    paper = models.ForeignKey('Paper', on_delete=models.CASCADE, related_name='embeddings')
+    embedding_model = models.CharField(max_length=255)
+    abstract_hash = models.CharField(max_length=64)  # sha1 of the abstract the vector was computed from
+    dim = models.IntegerField()
+    vector = models.BinaryField()  # float32 bytes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['paper', 'embedding_model'], name='unique_paper_embedding_per_model'),
+        ]
+
+    def __str__(self):
+        return f"{self.embedding_model} [{self.paper_id}] dim={self.dim}"
+
+class IngestJob(models.Model):
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    params_hash = models.CharField(max_length=64, unique=True)
+    params = models.JSONField()  # fetch_papers query arguments
+    cursor = models.TextField(default='*')  # CrossRef cursor of the next page to fetch
+    pages_done = models.IntegerField(default=0)
+    items_seen = models.IntegerField(default=0)
+    saved_count = models.IntegerField(default=0)
+    total_results = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"IngestJob {self.id} {self.params} [{self.status}] {self.items_seen}/{self.total_results}"
+
+class IngestJobDoi(models.Model):
+    # DOIs whose Semantic Scholar enrichment is already done for a job
+    job = models.ForeignKey('IngestJob', on_delete=models.CASCADE, related_name='enriched_dois')
+    doi = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'doi'], name='unique_enriched_doi_per_job'),
+        ]
+
+class AuthorSkillProfile(models.Model):
+    # per author/model/skill aggregate of ExtractedSkill, kept up to date by the extraction writer
+    author = models.ForeignKey('Author', on_delete=models.CASCADE, related_name='skill_profiles')
+    embedding_model = models.CharField(max_length=255)
+    skill_name = models.CharField(max_length=255)
+    paper_count = models.IntegerField(default=0)
+    mean_confidence = models.FloatField(default=0.0)
+    max_confidence = models.FloatField(default=0.0)
+    first_year = models.IntegerField(null=True, blank=True)
+    last_year = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'embedding_model', 'skill_name'], name='unique_author_skill_profile'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'embedding_model', '-paper_count'], name='profile_author_model_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} {self.skill_name} x{self.paper_count} ({self.mean_confidence:.2f}) [{self.embedding_model}]"
+
+class ExtractionJob(models.Model):
+    # queued extraction work, claimed and run by the run_extraction_worker command
+    KIND_CHOICES = [
+        ('paper', 'Paper'),
+        ('author', 'Author'),
+        ('years', 'Year range'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    paper = models.ForeignKey('Paper', on_delete=models.CASCADE, null=True, blank=True, related_name='extraction_jobs')
+    author = models.ForeignKey('Author', on_delete=models.CASCADE, null=True, blank=True, related_name='extraction_jobs')
+    start_year = models.IntegerField(null=True, blank=True)
+    end_year = models.IntegerField(null=True, blank=True)
+    top_k = models.IntegerField(default=5)
+    overwrite = models.BooleanField(default=False)  # re-extract papers that already have skills for the model
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    worker = models.CharField(max_length=255, blank=True, default='')  # "host:pid" of the worker that claimed it
+    embedding_model = models.CharField(max_length=255, blank=True, default='')
+    total_papers = models.IntegerField(default=0)
+    processed_papers = models.IntegerField(default=0)
+    skills_written = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # last progress save of the worker running it
+    finished_at = models.DateTimeField(null=True, blank=True)
+    run_seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='extractionjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"ExtractionJob {self.id} {self.kind} [{self.status}] {self.processed_papers}/{self.total_papers}"
+
+class ExtractionRun(models.Model):
+    # one row per distinct extraction configuration; papers are re-extracted when it or their abstract changes
+    config_hash = models.CharField(max_length=64, unique=True)
+    embedding_model = models.CharField(max_length=255)
+    skills_hash = models.CharField(max_length=64)  # sha256 of the skill file (or of the label list)
+    top_k = models.IntegerField()
+    min_confidence = models.FloatField(null=True, blank=True)
+    search = models.CharField(max_length=20, default='exact')
+    skill_embedding = models.CharField(max_length=20, default='label')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # last time a run with this configuration started
+
+    def __str__(self):
+        return f"ExtractionRun {self.id} {self.embedding_model} top_k={self.top_k} skills={self.skills_hash[:8]}"
+
+class ExtractedPaper(models.Model):
+    # marks a paper as done for a run, for the abstract it had then
+    run = models.ForeignKey('ExtractionRun', on_delete=models.CASCADE, related_name='papers')
+    paper = models.ForeignKey('Paper', on_delete=models.CASCADE, related_name='extraction_markers')
+    abstract_hash = models.CharField(max_length=40)
+    processed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # also the index behind the "not yet done for this run" lookup
+            models.UniqueConstraint(fields=['run', 'paper'], name='unique_run_paper'),
+        ]
@@ -1,7 +1,86 @@
 from rest_framework import serializers
-from .models import Paper
+from .models import Paper, Author, AuthorSkillProfile, ExtractionJob
 
-class PaperSerializer(serializers.HyperlinkedModelSerializer):
+class SparseFieldsMixin:
+    """Keep only the fields listed in ?fields=a,b,c (unknown names are ignored)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = requested_fields(request, self.Meta.fields) if request is not None else None
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+def requested_fields(request, allowed):
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return [f for f in (name.strip() for name in raw.split(',')) if f in allowed]
+
+
+class PaperSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Paper
-        fields = ('title', 'authors', 'year', 'doi', 'venue', 'abstract', 'fields_of_study', 'citation_count', 'url')
\ No newline at end of file
+        fields = ('id', 'title', 'authors', 'year', 'doi', 'venue', 'abstract', 'fields_of_study', 'citation_count', 'url')
+
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields = ('id', 'name')
+
+class AuthorSkillProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuthorSkillProfile
+        fields = ('skill_name', 'embedding_model', 'paper_count', 'mean_confidence', 'max_confidence', 'first_year', 'last_year')
+
+
+class ExtractRequestSerializer(serializers.Serializer):
+    text = serializers.CharField(required=False, allow_blank=False, max_length=20000)
+    top_k = serializers.IntegerField(required=False, default=5, min_value=1, max_value=100)
+    min_confidence = serializers.FloatField(required=False, allow_null=True, default=None, min_value=-1.0, max_value=1.0)
+    save = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if self.context.get("text_required") and not attrs.get("text"):
+            raise serializers.ValidationError({"text": "This field is required."})
+        return attrs
+
+
+class ExtractionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExtractionJob
+        fields = (
+            'id', 'kind', 'paper', 'author', 'start_year', 'end_year', 'top_k', 'overwrite',
+            'status', 'progress', 'total_papers', 'processed_papers', 'skills_written', 'embedding_model',
+            'worker', 'error', 'created_at', 'started_at', 'heartbeat_at', 'finished_at', 'run_seconds',
+        )
+        read_only_fields = fields
+
+    def get_progress(self, job):
+        if job.status == 'completed':
+            return 1.0
+        return round(job.processed_papers / job.total_papers, 3) if job.total_papers else 0.0
+
+
+class ExtractionJobRequestSerializer(serializers.Serializer):
+    # exactly one target: paper_id, author (id or name), or a start_year/end_year range
+    paper_id = serializers.IntegerField(required=False)
+    author = serializers.CharField(required=False, max_length=255)
+    start_year = serializers.IntegerField(required=False)
+    end_year = serializers.IntegerField(required=False)
+    top_k = serializers.IntegerField(required=False, default=5, min_value=1, max_value=100)
+    overwrite = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        targets = [name for name in ('paper_id', 'author') if name in attrs]
+        if 'start_year' in attrs or 'end_year' in attrs:
+            targets.append('years')
+        if len(targets) != 1:
+            raise serializers.ValidationError("Give exactly one of paper_id, author, or start_year/end_year.")
+        if attrs.get('start_year') is not None and attrs.get('end_year') is not None and attrs['start_year'] > attrs['end_year']:
+            raise serializers.ValidationError({"end_year": "end_year must not be before start_year."})
+        return attrs
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import random
+import subprocess
+import hashlib
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class HashingEncoder:
+    """
+    Offline stand-in for SentenceTransformer: hashed bag-of-words vectors.
+    Deterministic and cheap, so benchmark numbers measure the pipeline around the model.
+    """
+
+    device = "cpu"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _token_index(self, token):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.dim
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                out[row, self._token_index(token)] += 1.0
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+def synthetic_vocabulary(size=5000, seed=0):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def synthetic_skills(count, vocabulary, seed=0):
+    rng = random.Random(seed + 1)
+    skills = set()
+    while len(skills) < count:
+        skills.add(" ".join(rng.sample(vocabulary, rng.randint(1, 4))))
+    return sorted(skills)
+
+
+def synthetic_papers(count, vocabulary, seed=0, abstract_words=150):
+    rng = random.Random(seed + 2)
+    for i in range(count):
+        yield {
+            "title": " ".join(rng.sample(vocabulary, 8)),
+            "authors": ", ".join(" ".join(rng.sample(vocabulary, 2)).title() for _ in range(rng.randint(1, 5))),
+            "year": rng.randint(1995, 2025),
+            "doi": f"10.5555/bench.{seed}.{i}",
+            "abstract": " ".join(rng.choices(vocabulary, k=abstract_words)),
+            "citation_count": rng.randint(0, 500),
+        }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds > 0 else None
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from api.services.http import TokenBucket, make_session, request_with_retry
+
+CROSSREF_API_URL = "https://api.crossref.org/works"
+# only the fields fetch_papers reads, so pages stay small
+CROSSREF_SELECT = "DOI,title,author,published-print,published-online,container-title,URL"
+
+
+class CrossRefError(Exception):
+    pass
+
+
+class CrossRefClient:
+    """Deep-pages /works with cursors and fetches the next page while the current one is processed."""
+
+    def __init__(self, url=CROSSREF_API_URL, rows=1000, select=CROSSREF_SELECT, mailto=None,
+                 rate=5.0, retries=5, session=None):
+        self.url = url
+        self.rows = rows
+        self.select = select
+        self.mailto = mailto  # identifies us for CrossRef's polite pool
+        self.retries = retries
+        self.limiter = TokenBucket(rate)
+        # pages are never cached: a cursor expires after a few idle minutes, so a replayed
+        # next-cursor would be dead by the time the first uncached page asks for it
+        self.session = session or make_session(pool_size=2)
+
+    def fetch_page(self, params, cursor="*"):
+        params = {**params, "rows": self.rows, "cursor": cursor}
+        if self.select:
+            params["select"] = self.select
+        if self.mailto:
+            params["mailto"] = self.mailto
+        response = request_with_retry(self.session, "GET", self.url, limiter=self.limiter, retries=self.retries, params=params)
+        if response.status_code != 200:
+            raise CrossRefError(f"CrossRef API error ({response.status_code})")
+        return response.json().get("message", {})
+
+    def iter_pages(self, params, cursor="*"):
+        """Yield (cursor, message) for every non-empty page, starting at `cursor`."""
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self.fetch_page, params, cursor)
+            while future is not None:
+                message = future.result()
+                items = message.get("items", [])
+                if not items:
+                    return
+                next_cursor = message.get("next-cursor")
+                future = None
+                if next_cursor and len(items) >= self.rows:
+                    future = pool.submit(self.fetch_page, params, next_cursor)
+                yield cursor, message
+                cursor = next_cursor
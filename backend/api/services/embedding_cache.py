@@ -0,0 +1,187 @@
+import os
+import json
+import hashlib
+from django.conf import settings
+from django.db import transaction
+from api.models import PaperEmbedding, abstract_hash
+from api.services import metrics
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def normalize_skill(label):
+    return " ".join(str(label).split()).lower()
+
+
+class SkillEmbeddingCache:
+    """On-disk cache of skill embedding matrices (.npy), loaded with mmap on a hit."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = str(cache_dir or settings.SKILL_EMBEDDING_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, model_name, skill_list, skills_file=None, mode="label"):
+        h = hashlib.sha256()
+        h.update(model_name.encode("utf-8"))
+        if mode != "label":
+            # label-mode keys are left unchanged so existing cache entries stay valid
+            h.update(f"mode={mode}".encode("utf-8"))
+        if skills_file:
+            h.update(file_sha256(skills_file).encode("ascii"))
+        for i, skill in enumerate(skill_list):
+            h.update(normalize_skill(skill).encode("utf-8"))
+            if mode != "label":
+                for alt in skill_list.alt_labels_of(i):
+                    h.update(b"\t" + normalize_skill(alt).encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def index_path(self, key, kind):
+        return os.path.join(self.cache_dir, f"{key}.{kind}")
+
+    def load(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        import numpy as np
+
+        self.hits += 1
+        # copy-on-write mmap: pages are shared between processes and only read on demand
+        return np.load(path, mmap_mode="c")
+
+    def save(self, key, embeddings, **meta):
+        import numpy as np
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, path)
+        meta.update({"key": key, "shape": list(embeddings.shape)})
+        with open(os.path.join(self.cache_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return path
+
+    def get_or_build(self, model_name, skill_list, encode, skills_file=None, key=None):
+        key = key or self.key(model_name, skill_list, skills_file)
+        embeddings = self.load(key)
+        if embeddings is None:
+            import numpy as np
+
+            embeddings = np.asarray(encode(skill_list), dtype=np.float32)
+            self.save(key, embeddings, model=model_name, skills_file=skills_file, count=len(skill_list))
+            embeddings = self.load(key)
+            self.hits -= 1  # the reload right after building is not a real hit
+        return embeddings
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in sorted(os.listdir(self.cache_dir)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+                entries.append(json.load(f))
+        return entries
+
+    def clear(self, key=None):
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if key is not None and not name.startswith(key):
+                continue
+            if name.endswith((".npy", ".json", ".hnsw")):
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class PaperEmbeddingStore:
+    """Abstract embeddings persisted per (paper, model), reused while the abstract hash still matches."""
+
+    def __init__(self, model_name, defer_writes=False, db_batch_size=500):
+        self.model_name = model_name
+        self.defer_writes = defer_writes  # collect writes in self.pending instead of hitting the DB
+        self.db_batch_size = db_batch_size
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get_many(self, papers):
+        import numpy as np
+
+        hashes = {paper.id: abstract_hash(paper.abstract) for paper in papers}
+        found = {}
+        ids = list(hashes)
+        for i in range(0, len(ids), self.db_batch_size):
+            rows = PaperEmbedding.objects.filter(
+                embedding_model=self.model_name, paper_id__in=ids[i:i + self.db_batch_size]
+            ).values_list("paper_id", "abstract_hash", "vector")
+            for paper_id, stored_hash, vector in rows:
+                if stored_hash == hashes[paper_id]:
+                    found[paper_id] = np.frombuffer(vector, dtype=np.float32)
+                else:
+                    self.stale += 1  # abstract changed since it was encoded
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, papers, embeddings):
+        import numpy as np
+
+        entries = [
+            (paper.id, abstract_hash(paper.abstract), np.asarray(vector, dtype=np.float32))
+            for paper, vector in zip(papers, embeddings)
+        ]
+        if self.defer_writes:
+            self.pending.extend(entries)
+        else:
+            self.write(entries)
+
+    def write(self, entries):
+        rows = [
+            PaperEmbedding(
+                paper_id=paper_id,
+                embedding_model=self.model_name,
+                abstract_hash=digest,
+                dim=vector.shape[0],
+                vector=vector.tobytes(),
+            )
+            for paper_id, digest, vector in entries
+        ]
+        if not rows:
+            return
+        with metrics.timer("db_write_seconds", table="paper_embedding"), transaction.atomic():
+            PaperEmbedding.objects.bulk_create(
+                rows,
+                batch_size=self.db_batch_size,
+                update_conflicts=True,
+                unique_fields=["paper", "embedding_model"],
+                update_fields=["abstract_hash", "dim", "vector", "updated_at"],
+            )
+        metrics.inc("db_rows_written_total", len(rows), table="paper_embedding")
+
+    def drain(self):
+        entries, self.pending = self.pending, []
+        return entries
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
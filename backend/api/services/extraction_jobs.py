@@ -0,0 +1,117 @@
+import os
+import time
+import socket
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from api.models import ExtractionJob, Paper
+from api.services.extraction_runs import pending_papers, run_for_extractor
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_papers(job, run):
+    """Papers a job covers, minus the ones the run already did with the same abstract unless it overwrites."""
+    papers = Paper.objects.filter(abstract__isnull=False).exclude(abstract__exact='')
+    if job.kind == 'paper':
+        papers = papers.filter(id=job.paper_id)
+    elif job.kind == 'author':
+        papers = papers.filter(authorships__author_id=job.author_id)
+    elif job.kind == 'years':
+        if job.start_year is not None:
+            papers = papers.filter(year__gte=job.start_year)
+        if job.end_year is not None:
+            papers = papers.filter(year__lte=job.end_year)
+    if not job.overwrite:
+        papers = pending_papers(papers, run)
+    return papers
+
+
+def claim_job(worker):
+    """
+    Move the oldest queued job to running for this worker and return it (None when the queue is empty).
+    One job at a time, so the rest stay queued for other workers. The conditional UPDATE only flips
+    a row that is still queued, so two workers never get the same job.
+    """
+    while True:
+        job_id = ExtractionJob.objects.filter(status='queued').order_by('id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ExtractionJob.objects.filter(id=job_id, status='queued').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return ExtractionJob.objects.get(id=job_id)
+        # another worker got it first; try the next one
+
+
+def requeue_stale_jobs(older_than):
+    # jobs whose worker stopped saving progress (it died); they restart from scratch (finished papers are skipped)
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return ExtractionJob.objects.filter(status='running', heartbeat_at__lt=cutoff).update(
+        status='queued', worker='', started_at=None, heartbeat_at=None,
+    )
+
+
+def release_jobs(worker):
+    # hand this worker's unfinished jobs back to the queue (e.g. on shutdown)
+    return ExtractionJob.objects.filter(status='running', worker=worker).update(
+        status='queued', worker='', started_at=None, heartbeat_at=None,
+    )
+
+
+class JobProgress:
+    """tqdm-like progress sink for ExtractionPipeline that saves the job's counters every few seconds."""
+
+    def __init__(self, job, every=2.0):
+        self.job = job
+        self.every = every
+        self.count = 0
+        self._saved_at = time.monotonic()
+
+    def update(self, n):
+        self.count += n
+        if time.monotonic() - self._saved_at >= self.every:
+            self.save()
+
+    def save(self):
+        # also the heartbeat requeue_stale_jobs checks
+        ExtractionJob.objects.filter(id=self.job.id).update(processed_papers=self.count, heartbeat_at=timezone.now())
+        self._saved_at = time.monotonic()
+
+
+def run_job(job, extractor, batch_size=64, queue_size=4, flush_every=500):
+    from api.services.pipeline import ExtractionPipeline
+    from api.services.skill_extraction import ExtractedSkillWriter
+
+    started = time.perf_counter()
+    run = run_for_extractor(extractor, job.top_k, skills_file=str(settings.SKILL_EXTRACTION["SKILLS_FILE"]))
+    papers = job_papers(job, run)
+    job.embedding_model = extractor.model_name
+    job.total_papers = papers.count()
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.save(update_fields=['embedding_model', 'total_papers', 'started_at', 'heartbeat_at'])
+
+    progress = JobProgress(job)
+    writer = ExtractedSkillWriter(flush_every=flush_every, run=run)
+    try:
+        if job.total_papers:
+            author_name = job.author.name if job.kind == 'author' else None
+            pipeline = ExtractionPipeline(
+                extractor, writer, batch_size=batch_size, queue_size=queue_size,
+                top_k=job.top_k, author_name=author_name, progress=progress,
+            )
+            pipeline.run(papers)
+        job.status = 'completed'
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f"{type(e).__name__}: {e}"
+    job.processed_papers = progress.count
+    job.skills_written = writer.written
+    job.finished_at = timezone.now()
+    job.run_seconds = round(time.perf_counter() - started, 3)
+    job.save(update_fields=['status', 'error', 'processed_papers', 'skills_written', 'finished_at', 'run_seconds'])
+    return job
@@ -0,0 +1,53 @@
+import json
+import hashlib
+from django.db.models import Exists, OuterRef
+from api.models import ExtractionRun, ExtractedPaper
+from api.services.embedding_cache import file_sha256, normalize_skill
+
+
+def skills_fingerprint(skills_file=None, skill_list=()):
+    if skills_file:
+        return file_sha256(skills_file)
+    h = hashlib.sha256()
+    for skill in skill_list:
+        h.update(normalize_skill(skill).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def get_run(embedding_model, skills_hash, top_k, min_confidence=None, search="exact", skill_embedding="label"):
+    """The ExtractionRun for this configuration, created on first use; its updated_at is bumped on every call."""
+    config = {
+        "embedding_model": embedding_model,
+        "skills_hash": skills_hash,
+        "top_k": top_k,
+        "min_confidence": min_confidence,
+        "search": search,
+        "skill_embedding": skill_embedding,
+    }
+    config_hash = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+    run, created = ExtractionRun.objects.get_or_create(config_hash=config_hash, defaults=config)
+    if not created:
+        run.save(update_fields=["updated_at"])
+    return run
+
+
+def run_for_extractor(extractor, top_k, min_confidence=None, skills_file=None):
+    return get_run(
+        extractor.model_name,
+        skills_fingerprint(skills_file, extractor.skill_list),
+        top_k,
+        min_confidence=min_confidence,
+        search=extractor.search.name,
+        skill_embedding=extractor.skill_embedding,
+    )
+
+
+def pending_papers(papers, run):
+    """
+    Papers with no marker for this run, or whose abstract changed since theirs was written.
+    A correlated NOT EXISTS probe on the (run, paper) unique index per paper, instead of
+    an anti-join over every ExtractedSkill row of the model.
+    """
+    done = ExtractedPaper.objects.filter(run=run, paper=OuterRef("pk"), abstract_hash=OuterRef("abstract_hash"))
+    return papers.filter(~Exists(done))
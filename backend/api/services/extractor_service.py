@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from django.conf import settings
+
+_lock = threading.Lock()
+_extractor = None
+_batcher = None
+_load_error = None  # (exception, time.monotonic()) of the last failed build
+
+
+def get_extractor():
+    """
+    Process-wide SkillExtractor, built on first use from settings.SKILL_EXTRACTION.
+    A failed build (e.g. missing skills file) is re-raised without retrying for RETRY_LOAD_AFTER seconds,
+    so requests don't each repeat the model and taxonomy load.
+    """
+    global _extractor, _load_error
+    if _extractor is None:
+        with _lock:
+            if _extractor is None:
+                retry_after = settings.SKILL_EXTRACTION.get("RETRY_LOAD_AFTER", 300)
+                if _load_error is not None and time.monotonic() - _load_error[1] < retry_after:
+                    raise _load_error[0].with_traceback(None)
+                from api.services.embedding_cache import SkillEmbeddingCache
+                from api.services.skill_extraction import SkillExtractor
+                from api.services.skill_taxonomy import load_taxonomy
+
+                config = settings.SKILL_EXTRACTION
+                skills_file = str(config["SKILLS_FILE"])
+                skill_embedding = config.get("SKILL_EMBEDDING", "label")
+                try:
+                    _extractor = SkillExtractor(
+                        skill_list=load_taxonomy(skills_file, alt_labels=skill_embedding == "mean"),
+                        model_name=config["MODEL"],
+                        skills_file=skills_file,
+                        cache=SkillEmbeddingCache(),
+                        search=config.get("SEARCH", "exact"),
+                        backend=config.get("BACKEND", "torch"),
+                        skill_embedding=skill_embedding,
+                    )
+                except Exception as e:
+                    _load_error = (e, time.monotonic())
+                    raise
+                _load_error = None
+    return _extractor
+
+
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        extractor = get_extractor()
+        with _lock:
+            if _batcher is None:
+                config = settings.SKILL_EXTRACTION
+                _batcher = MicroBatcher(
+                    extractor,
+                    max_batch=config.get("MAX_BATCH", 32),
+                    max_wait=config.get("MAX_WAIT_MS", 5) / 1000,
+                )
+    return _batcher
+
+
+class MicroBatcher:
+    """
+    Collects concurrent rank requests for up to `max_wait` seconds (or `max_batch` texts)
+    and serves them with a single encode call on a background thread.
+    """
+
+    def __init__(self, extractor, max_batch=32, max_wait=0.005):
+        self.extractor = extractor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="skill-micro-batcher", daemon=True)
+        self.thread.start()
+
+    def rank(self, text, top_k=5, min_confidence=None, timeout=None):
+        future = Future()
+        self.requests.put((text, top_k, min_confidence, future))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                # one pass at the largest k asked for, then trimmed per request
+                ranked = self.extractor.rank_texts(
+                    [text for text, _, _, _ in batch],
+                    top_k=max(top_k for _, top_k, _, _ in batch),
+                    batch_size=len(batch),
+                )
+            except Exception as e:
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, top_k, min_confidence, future), skills in zip(batch, ranked):
+                skills = skills[:top_k]
+                if min_confidence is not None:
+                    skills = [s for s in skills if s["confidence"] >= min_confidence]
+                future.set_result(skills)
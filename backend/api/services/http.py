@@ -0,0 +1,82 @@
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from api.services import metrics
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size=10, headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def _retry_delay(response, attempt, backoff, max_backoff):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), max_backoff)
+        except ValueError:
+            pass
+    # exponential backoff with jitter
+    return min(backoff * (2 ** attempt), max_backoff) * (0.5 + random.random() / 2)
+
+
+def request_with_retry(session, method, url, limiter=None, retries=5, backoff=1.0, max_backoff=60.0, timeout=30, **kwargs):
+    """
+    Send one HTTP request, retrying 429/5xx responses and connection errors with backoff.
+    Returns the last response; raises the last exception if every attempt failed to connect.
+    """
+    host = urlsplit(url).hostname
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        if attempt:
+            metrics.inc("http_retries_total", host=host)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+            metrics.inc("http_requests_total", host=host, status="error")
+            if attempt == retries:
+                raise
+            time.sleep(_retry_delay(None, attempt, backoff, max_backoff))
+            continue
+        metrics.observe("http_request_seconds", time.perf_counter() - started, host=host)
+        metrics.inc("http_requests_total", host=host, status=response.status_code)
+
+        if response.status_code not in RETRY_STATUS or attempt == retries:
+            return response
+        time.sleep(_retry_delay(response, attempt, backoff, max_backoff))
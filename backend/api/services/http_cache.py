@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+class CachedResponse:
+    """The parts of requests.Response that the API clients read, rebuilt from the cache."""
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+        self.from_cache = True
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """
+    SQLite-backed HTTP response cache with a TTL and least-recently-used eviction by total size.
+    Hits only record their access time in memory; it is written with the next set_many(), every
+    `touch_every` hits, or on close(), so a lookup never costs a commit.
+    """
+
+    def __init__(self, cache_dir, ttl=7 * 24 * 3600, max_bytes=512 * 1024 * 1024, touch_every=500):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "responses.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.touch_every = touch_every
+        self._touched = {}  # key -> time of its last hit, not yet written
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, status INTEGER, body BLOB,"
+            " created REAL, accessed REAL, size INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.conn.commit()
+        self._size = self._total_size()
+
+    @staticmethod
+    def key(method, url, params=None, body=None):
+        payload = json.dumps([method.upper(), url, sorted((params or {}).items()), body], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT status, body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl and now - row[2] > self.ttl):
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_every:
+                self._write_touches()
+                self.conn.commit()
+            self.hits += 1
+        return CachedResponse(row[0], row[1])
+
+    def set(self, key, status, body):
+        self.set_many([(key, status, body)])
+
+    def set_many(self, entries):
+        now = time.time()
+        rows = []
+        for key, status, body in entries:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            rows.append((key, status, body, now, now, len(body)))
+        with self.lock:
+            # eviction below orders by access time, so pending hits go in first
+            self._write_touches()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, status, body, created, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # running estimate (replaced rows are counted twice); the exact sum is taken before evicting
+            self._size += sum(row[5] for row in rows)
+            if self._size > self.max_bytes:
+                self._evict(now)
+            self.conn.commit()
+
+    def _write_touches(self):
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _total_size(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self, now):
+        if self.ttl:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self._size = self._total_size()
+        if self._size <= self.max_bytes:
+            return
+        # drop least recently used entries until the cache is back under 90% of the limit
+        excess = self._size - int(self.max_bytes * 0.9)
+        while excess > 0:
+            oldest = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 500").fetchall()
+            if not oldest:
+                break
+            doomed = []
+            for key, size in oldest:
+                doomed.append((key,))
+                excess -= size
+                self._size -= size
+                if excess <= 0:
+                    break
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self):
+        with self.lock:
+            self._touched = {}
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self._size = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self.lock:
+            self._write_touches()
+            self.conn.commit()
+            self.conn.close()
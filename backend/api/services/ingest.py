@@ -0,0 +1,171 @@
+import json
+import hashlib
+from django.db import transaction
+from api.models import Paper, Author, PaperAuthor, IngestJob, IngestJobDoi, abstract_hash
+from api.services import metrics
+from api.services.response_cache import bump_data_version
+from api.services.skill_profiles import refresh_author_profiles
+
+# fields refreshed on papers that already exist when update_existing=True
+PAPER_UPDATE_FIELDS = ("citation_count", "abstract", "fields_of_study")
+
+
+def normalize_author_name(name):
+    return " ".join(name.split()).lower()
+
+
+def split_authors(authors):
+    # Paper.authors is the ", "-joined list fetch_papers builds
+    return [a.strip() for a in (authors or "").split(",") if a.strip()]
+
+
+def link_paper_authors(paper_authors, db_batch_size=500):
+    """Create Author rows and PaperAuthor links for [(paper_id, [author name, ...]), ...]."""
+    names = {}
+    for _, authors in paper_authors:
+        for name in authors:
+            names.setdefault(normalize_author_name(name), name)
+    if not names:
+        return 0
+    Author.objects.bulk_create(
+        [Author(name=name, name_key=key) for key, name in names.items()],
+        batch_size=db_batch_size,
+        ignore_conflicts=True,
+    )
+    ids = {}
+    keys = list(names)
+    for i in range(0, len(keys), db_batch_size):
+        ids.update(Author.objects.filter(name_key__in=keys[i:i + db_batch_size]).values_list("name_key", "id"))
+
+    links = []
+    for paper_id, authors in paper_authors:
+        seen = set()
+        for position, name in enumerate(authors):
+            author_id = ids[normalize_author_name(name)]
+            if author_id not in seen:
+                seen.add(author_id)
+                links.append(PaperAuthor(paper_id=paper_id, author_id=author_id, position=position))
+    PaperAuthor.objects.bulk_create(links, batch_size=db_batch_size, ignore_conflicts=True)
+    return len(links)
+
+
+def relink_paper_authors(paper):
+    """
+    Rebuild one saved paper's PaperAuthor links from its authors text, dropping links to names that are gone.
+    Paper.save() calls this for API and admin writes; save_papers links its bulk inserts itself.
+    """
+    with transaction.atomic():
+        before = set(paper.authorships.values_list("author_id", flat=True))
+        paper.authorships.all().delete()
+        link_paper_authors([(paper.id, split_authors(paper.authors))])
+        after = set(paper.authorships.values_list("author_id", flat=True))
+        if before != after:
+            # skill profiles aggregate over the links, so authors added or dropped need theirs recomputed
+            refresh_author_profiles(before | after)
+
+
+def save_papers(records, update_existing=False, update_fields=PAPER_UPDATE_FIELDS, db_batch_size=500):
+    """
+    Upsert one page of parsed records (dicts of Paper fields including "doi") in a single transaction.
+    Returns (created, updated).
+    """
+    by_doi = {r["doi"]: r for r in records if r.get("doi")}
+    if not by_doi:
+        return 0, 0
+
+    with metrics.timer("db_write_seconds", table="paper"), transaction.atomic():
+        dois = list(by_doi)
+        existing = {}
+        for i in range(0, len(dois), db_batch_size):
+            existing.update(Paper.objects.filter(doi__in=dois[i:i + db_batch_size]).in_bulk(field_name="doi"))
+
+        new_papers = [
+            Paper(**r, abstract_hash=abstract_hash(r.get("abstract")))
+            for doi, r in by_doi.items() if doi not in existing
+        ]
+        Paper.objects.bulk_create(new_papers, batch_size=db_batch_size, ignore_conflicts=True)
+
+        # ignore_conflicts leaves pks unset, so look the new ids up before linking authors
+        new_dois = [paper.doi for paper in new_papers]
+        new_ids = {}
+        for i in range(0, len(new_dois), db_batch_size):
+            new_ids.update(Paper.objects.filter(doi__in=new_dois[i:i + db_batch_size]).values_list("doi", "id"))
+        link_paper_authors(
+            [(new_ids[doi], split_authors(by_doi[doi]["authors"])) for doi in new_dois if doi in new_ids],
+            db_batch_size=db_batch_size,
+        )
+
+        changed = []
+        if update_existing:
+            for doi, paper in existing.items():
+                record = by_doi[doi]
+                dirty = False
+                for field in update_fields:
+                    value = record.get(field)
+                    # never overwrite stored data with an empty enrichment result
+                    if value in (None, "") or getattr(paper, field) == value:
+                        continue
+                    setattr(paper, field, value)
+                    dirty = True
+                if dirty:
+                    changed.append(paper)
+            if changed:
+                fields = list(update_fields)
+                if "abstract" in fields:
+                    for paper in changed:
+                        paper.abstract_hash = abstract_hash(paper.abstract)
+                    fields.append("abstract_hash")
+                Paper.objects.bulk_update(changed, fields, batch_size=db_batch_size)
+        if new_papers or changed:
+            bump_data_version()
+
+    metrics.inc("db_rows_written_total", len(new_papers) + len(changed), table="paper")
+    return len(new_papers), len(changed)
+
+
+def ingest_params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def start_ingest_job(params, resume=False):
+    """Return the IngestJob for these query params; without `resume` any previous progress is reset."""
+    job, created = IngestJob.objects.get_or_create(
+        params_hash=ingest_params_hash(params), defaults={"params": params}
+    )
+    if not created and not resume:
+        with transaction.atomic():
+            job.enriched_dois.all().delete()
+            job.cursor = "*"
+            job.pages_done = 0
+            job.items_seen = 0
+            job.saved_count = 0
+            job.status = "running"
+            job.save()
+    elif not created and job.status == "failed":
+        job.status = "running"
+        job.save(update_fields=["status", "updated_at"])
+    return job
+
+
+def already_enriched(job, dois, db_batch_size=500):
+    dois = [doi for doi in dois if doi]
+    done = set()
+    for i in range(0, len(dois), db_batch_size):
+        done.update(
+            IngestJobDoi.objects.filter(job=job, doi__in=dois[i:i + db_batch_size]).values_list("doi", flat=True)
+        )
+    return done
+
+
+def checkpoint_ingest_job(job, next_cursor, items_seen, saved, enriched_dois):
+    # called inside the page's transaction, so the checkpoint and the saved papers commit together
+    IngestJobDoi.objects.bulk_create(
+        [IngestJobDoi(job=job, doi=doi) for doi in enriched_dois if doi],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    job.cursor = next_cursor or job.cursor
+    job.pages_done += 1
+    job.items_seen += items_seen
+    job.saved_count += saved
+    job.save(update_fields=["cursor", "pages_done", "items_seen", "saved_count", "updated_at"])
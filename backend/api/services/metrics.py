@@ -0,0 +1,185 @@
+import json
+import time
+import bisect
+import cProfile
+import threading
+from contextlib import contextmanager
+
+# upper bounds (seconds) shared by every latency histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "http_requests_total": "Outgoing HTTP attempts by host and status code (or 'error').",
+    "http_retries_total": "Outgoing HTTP attempts that were retried, by host.",
+    "http_request_seconds": "Latency of one outgoing HTTP attempt, by host.",
+    "http_cache_hits_total": "Semantic Scholar DOI lookups answered from the response cache, by host.",
+    "embedding_batch_seconds": "Time of one model.encode call over abstracts or request texts, by model.",
+    "embedding_batch_size": "Texts per model.encode call, by model.",
+    "papers_extracted_total": "Papers run through skill extraction, by model.",
+    "db_write_seconds": "Time of one bulk write transaction, by table.",
+    "db_rows_written_total": "Rows written by bulk writes, by table.",
+    "extraction_papers_per_second": "Papers per second of the last extract_skills run, by model.",
+    "ingest_papers_per_second": "Papers per second saved by the last fetch_papers run.",
+    "pipeline_items_per_second": "Throughput of each extraction pipeline stage in the last run.",
+    "pipeline_utilization": "Busy share of wall time of each extraction pipeline stage in the last run.",
+    "api_request_seconds": "API request latency by endpoint, method and status.",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms keyed by name and labels.
+    Each process (web worker, management command) has its own registry.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in series}):
+                    lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (n, key), value in sorted(series.items()):
+                        if n == name:
+                            lines.append(f"{name}{_format_labels(key)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for (n, key), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        def series_name(name, key):
+            return name + _format_labels(key)
+
+        with self.lock:
+            return {
+                "counters": {series_name(n, k): v for (n, k), v in sorted(self.counters.items())},
+                "gauges": {series_name(n, k): v for (n, k), v in sorted(self.gauges.items())},
+                "histograms": {
+                    series_name(n, k): {
+                        "count": h.count,
+                        "sum": round(h.sum, 6),
+                        "mean": round(h.sum / h.count, 6) if h.count else None,
+                    }
+                    for (n, k), h in sorted(self.histograms.items(), key=lambda item: item[0])
+                },
+            }
+
+
+registry = MetricsRegistry()
+inc = registry.inc
+set_gauge = registry.set
+observe = registry.observe
+timer = registry.timer
+
+
+def add_instrumentation_arguments(parser):
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        metavar="PATH",
+        help="Write the run's counters and timing histograms as JSON to this file ('-' for stdout).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Profile the run with cProfile (main thread) and write the stats to this file (view with pstats or snakeviz).",
+    )
+
+
+@contextmanager
+def instrument_command(stats_json=None, profile=None, stdout=None):
+    """Wrap a management command run: optional cProfile dump and a JSON dump of the metrics it recorded."""
+    profiler = cProfile.Profile() if profile else None
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        if stats_json:
+            payload = json.dumps({"wall_seconds": round(time.perf_counter() - started, 3), **registry.snapshot()}, indent=2)
+            if stats_json == "-":
+                (stdout.write if stdout is not None else print)(payload)
+            else:
+                with open(stats_json, "w", encoding="utf-8") as f:
+                    f.write(payload + "\n")
@@ -0,0 +1,45 @@
+BACKENDS = ("torch", "onnx", "int8")
+
+
+def model_tag(model_name, backend="torch"):
+    # stored as ExtractedSkill.embedding_model, so results of different backends never mix
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+def load_model(model_name, backend="torch"):
+    """
+    torch: full-precision SentenceTransformer.
+    onnx:  ONNX Runtime through sentence-transformers' backend="onnx" (exported on first load; needs optimum[onnxruntime]).
+    int8:  PyTorch dynamic int8 quantization of the Linear layers, CPU only.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown model backend: {backend} (choose from {', '.join(BACKENDS)})")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name, backend="onnx")
+        except ImportError as e:
+            raise ImportError(f"the onnx backend needs optimum and onnxruntime (pip install 'optimum[onnxruntime]'): {e}")
+    # int8
+    import torch
+
+    model = SentenceTransformer(model_name, device="cpu")
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def topk_agreement(reference, candidate, texts, top_k=5):
+    """Mean share of the reference extractor's top-k skills that the candidate also returns."""
+    if not texts:
+        return 1.0
+    ref = reference.rank_texts(texts, top_k=top_k)
+    cand = candidate.rank_texts(texts, top_k=top_k)
+    overlaps = []
+    for r, c in zip(ref, cand):
+        expected = {s["skill_name"] for s in r}
+        if expected:
+            overlaps.append(len(expected & {s["skill_name"] for s in c}) / len(expected))
+    return sum(overlaps) / len(overlaps) if overlaps else 1.0
@@ -0,0 +1,180 @@
+import time
+import queue
+import threading
+from django.db import connection
+from api.services import metrics
+
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0  # seconds doing the stage's own work
+        self.waiting = 0.0  # seconds blocked on the queue before (starved) or after (backpressure) it
+
+    def as_dict(self, wall):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "waiting_seconds": round(self.waiting, 3),
+            "items_per_sec": round(self.items / self.busy, 1) if self.busy > 0 else None,
+            "utilization": round(self.busy / wall, 3) if wall > 0 else None,
+        }
+
+
+class ExtractionPipeline:
+    """
+    Three overlapped stages joined by bounded queues:
+    reader thread (papers from the DB) -> encoder (this thread: model + skill search) -> writer thread (bulk inserts).
+    A full queue blocks the stage in front of it, so memory stays bounded and the encoder sets the pace.
+    """
+
+    def __init__(self, extractor, writer, batch_size=64, queue_size=4, top_k=5, author_name=None,
+                 min_confidence=None, progress=None):
+        self.extractor = extractor
+        self.writer = writer
+        self.batch_size = batch_size
+        self.top_k = top_k
+        self.author_name = author_name
+        self.min_confidence = min_confidence
+        self.progress = progress
+        self.read_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.stop = threading.Event()
+        self.errors = []
+        self.stats = {name: StageStats(name) for name in ("read", "encode", "write")}
+        self.wall = 0.0
+
+    def _put(self, q, item, stats):
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.waiting += time.perf_counter() - started
+
+    def _get(self, q, stats):
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        else:
+            item = _DONE
+        stats.waiting += time.perf_counter() - started
+        return item
+
+    def _read(self, papers):
+        stats = self.stats["read"]
+        try:
+            # ids first, then one short query per batch: no read cursor stays open on SQLite
+            # while the writer thread commits
+            started = time.perf_counter()
+            paper_ids = list(papers.order_by("id").values_list("id", flat=True))
+            stats.busy += time.perf_counter() - started
+            model = papers.model
+            for i in range(0, len(paper_ids), self.batch_size):
+                if self.stop.is_set():
+                    break
+                started = time.perf_counter()
+                batch = list(model.objects.filter(id__in=paper_ids[i:i + self.batch_size]).order_by("id"))
+                stats.busy += time.perf_counter() - started
+                stats.items += len(batch)
+                self._put(self.read_queue, batch, stats)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            self._put(self.read_queue, _DONE, stats)
+            connection.close()
+
+    def _write(self):
+        stats = self.stats["write"]
+        paper_store = self.extractor.paper_store
+        try:
+            while True:
+                item = self._get(self.write_queue, stats)
+                if item is _DONE:
+                    break
+                results, embeddings, processed = item
+                started = time.perf_counter()
+                if paper_store is not None and embeddings:
+                    paper_store.write(embeddings)
+                self.writer.add(results, processed=processed)
+                stats.busy += time.perf_counter() - started
+                stats.items += len(processed)
+                if self.progress is not None:
+                    self.progress.update(len(processed))
+            if not self.stop.is_set():
+                started = time.perf_counter()
+                self.writer.flush()
+                stats.busy += time.perf_counter() - started
+        except Exception as e:
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            connection.close()
+
+    def run(self, papers):
+        paper_store = self.extractor.paper_store
+        if paper_store is not None:
+            # new abstract embeddings travel to the writer thread instead of being written here
+            paper_store.defer_writes = True
+
+        started = time.perf_counter()
+        reader = threading.Thread(target=self._read, args=(papers,), name="extract-reader", daemon=True)
+        writer = threading.Thread(target=self._write, name="extract-writer", daemon=True)
+        reader.start()
+        writer.start()
+
+        stats = self.stats["encode"]
+        processed = 0
+        try:
+            while True:
+                batch = self._get(self.read_queue, stats)
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                results = self.extractor.extract_batch(
+                    batch,
+                    author_name=self.author_name,
+                    top_k=self.top_k,
+                    batch_size=self.batch_size,
+                    save_to_db=False,
+                    min_confidence=self.min_confidence,
+                )
+                embeddings = paper_store.drain() if paper_store is not None else []
+                stats.busy += time.perf_counter() - t0
+                stats.items += len(batch)
+                processed += len(batch)
+                processed_papers = [(paper.id, paper.abstract_hash) for paper in batch]
+                self._put(self.write_queue, (results, embeddings, processed_papers), stats)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            self._put(self.write_queue, _DONE, stats)
+            reader.join()
+            writer.join()
+            if paper_store is not None:
+                paper_store.defer_writes = False
+            self.wall = time.perf_counter() - started
+
+        for stage in self.report():
+            if stage["items_per_sec"] is not None:
+                metrics.set_gauge("pipeline_items_per_second", stage["items_per_sec"], stage=stage["stage"])
+            if stage["utilization"] is not None:
+                metrics.set_gauge("pipeline_utilization", stage["utilization"], stage=stage["stage"])
+        if self.errors:
+            raise self.errors[0]
+        return processed
+
+    def report(self):
+        return [stats.as_dict(self.wall) for stats in self.stats.values()]
@@ -0,0 +1,36 @@
+import time
+import hashlib
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.db import transaction
+
+DATA_VERSION_KEY = "api:data-version"
+
+
+def data_version():
+    """
+    Current version of the paper/skill data, shared by every process through the cache backend.
+    A missing counter (first use, or culled) restarts at the current time, which invalidates everything.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(DATA_VERSION_KEY, version, timeout=None):
+            version = cache.get(DATA_VERSION_KEY, version)
+    return version
+
+
+def _bump():
+    # a fresh timestamp instead of get+1: two processes bumping at once can't go back to an old value
+    cache.set(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_data_version():
+    """Invalidate cached API responses once the current transaction commits (right away outside one)."""
+    transaction.on_commit(_bump)
+
+
+def response_key(request, endpoint, version):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = f"{endpoint}|{request.get_host()}|{request.path}|{params}|{version}"
+    return "api:response:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
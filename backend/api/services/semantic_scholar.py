@@ -0,0 +1,100 @@
+import json
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from api.services import metrics
+from api.services.http import TokenBucket, make_session, request_with_retry
+
+S2_API_URL = "https://api.semanticscholar.org/graph/v1"
+S2_FIELDS = "title,abstract,fieldsOfStudy,citationCount"
+S2_BATCH_LIMIT = 500  # max ids per POST /paper/batch
+
+
+def parse_s2_paper(data):
+    return {
+        "abstract": data.get("abstract"),
+        "fields_of_study": ",".join(data.get("fieldsOfStudy", []) or []),
+        "citation_count": data.get("citationCount", 0) or 0,
+    }
+
+
+class SemanticScholarClient:
+    """Looks up papers by DOI through the batch endpoint, several batches at once, rate limited."""
+
+    def __init__(self, base_url=S2_API_URL, api_key=None, rate=1.0, concurrency=4,
+                 batch_size=S2_BATCH_LIMIT, fields=S2_FIELDS, retries=5, session=None, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = min(batch_size, S2_BATCH_LIMIT)
+        self.concurrency = max(1, concurrency)
+        self.fields = fields
+        self.retries = retries
+        self.limiter = TokenBucket(rate)
+        self.session = session or make_session(
+            pool_size=self.concurrency, headers={"x-api-key": api_key} if api_key else None
+        )
+        self.cache = cache  # optional ResponseCache holding one record per DOI
+        self.failed_batches = 0
+        self.last_failed = set()  # DOIs of the batches that failed in the latest enrich() call
+
+    def fetch_batch(self, dois):
+        try:
+            response = request_with_retry(
+                self.session,
+                "POST",
+                f"{self.base_url}/paper/batch",
+                limiter=self.limiter,
+                retries=self.retries,
+                params={"fields": self.fields},
+                json={"ids": [f"DOI:{doi}" for doi in dois]},
+            )
+        except requests.RequestException:
+            self.failed_batches += 1
+            return None
+        if response.status_code != 200:
+            self.failed_batches += 1
+            return None
+
+        # the response is aligned with the request ids, null where a DOI is unknown
+        found = {}
+        records = response.json()
+        for doi, data in zip(dois, records):
+            if data:
+                found[doi.lower()] = parse_s2_paper(data)
+        if self.cache is not None:
+            # cache per DOI (unknown ones too) so overlapping harvests hit regardless of how batches fall
+            self.cache.set_many(
+                (self._cache_key(doi), 200, json.dumps(data)) for doi, data in zip(dois, records)
+            )
+        return found
+
+    def _cache_key(self, doi):
+        return self.cache.key("GET", f"{self.base_url}/paper/DOI:{doi.lower()}", {"fields": self.fields})
+
+    def enrich(self, dois):
+        """Return {doi.lower(): {"abstract", "fields_of_study", "citation_count"}} for the DOIs S2 knows."""
+        unique = list(dict.fromkeys(doi for doi in dois if doi))
+        found = {}
+        if self.cache is not None:
+            missing = []
+            for doi in unique:
+                cached = self.cache.get(self._cache_key(doi))
+                if cached is None:
+                    missing.append(doi)
+                    continue
+                data = cached.json()
+                if data:
+                    found[doi.lower()] = parse_s2_paper(data)
+            if len(missing) < len(unique):
+                metrics.inc("http_cache_hits_total", len(unique) - len(missing), host=urlsplit(self.base_url).hostname)
+            unique = missing
+        batches = [unique[i:i + self.batch_size] for i in range(0, len(unique), self.batch_size)]
+        self.last_failed = set()
+        if not batches:
+            return found
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            for batch, batch_found in zip(batches, pool.map(self.fetch_batch, batches)):
+                if batch_found is None:
+                    self.last_failed.update(batch)
+                else:
+                    found.update(batch_found)
+        return found
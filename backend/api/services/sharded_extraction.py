@@ -0,0 +1,155 @@
+import os
+import queue
+import pickle
+import traceback
+import multiprocessing as mp
+
+
+def shard_bounds(papers, workers):
+    # id-range shards with roughly the same number of papers in each
+    ordered = papers.order_by("id").values_list("id", flat=True)
+    total = ordered.count()
+    workers = max(1, min(workers, total))
+    starts = [ordered[i * total // workers] for i in range(workers)]
+    return [(lo, hi) for lo, hi in zip(starts, starts[1:] + [None])]
+
+
+def ensure_skill_cache(cache, model_name, skill_list, skills_file=None, search="exact", backend="torch", skill_embedding="label"):
+    # build the shared embedding file (and search index) once in the parent; workers only load them
+    from api.services.model_backends import model_tag
+    from api.services.skill_extraction import SkillExtractor
+    from api.services.skill_search import build_skill_search
+
+    key = cache.key(model_tag(model_name, backend), skill_list, skills_file, mode=skill_embedding)
+    if not os.path.exists(cache.path(key)):
+        SkillExtractor(
+            skill_list=skill_list, model_name=model_name, skills_file=skills_file, cache=cache,
+            search=search, backend=backend, skill_embedding=skill_embedding,
+        )
+        return
+    cache.hits += 1
+    if search != "exact" and not os.path.exists(cache.index_path(key, search)):
+        build_skill_search(search, cache.load(key), index_path=cache.index_path(key, search))
+
+
+def _run_shard(shard_index, bounds, options, results):
+    try:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", options["settings_module"])
+        import django
+        django.setup()
+
+        import torch
+        from django.db import connections
+        from api.models import Paper
+        from api.services.embedding_cache import SkillEmbeddingCache, PaperEmbeddingStore
+        from api.services.skill_extraction import SkillExtractor, chunked
+        from api.services.skill_taxonomy import load_taxonomy
+
+        # one core pool per worker instead of every worker grabbing all cores
+        torch.set_num_threads(options["threads"])
+
+        cache = SkillEmbeddingCache(options["cache_dir"])
+        paper_store = PaperEmbeddingStore(options["embedding_model"], defer_writes=True) if options["use_store"] else None
+        extractor = SkillExtractor(
+            skill_list=load_taxonomy(options["skills_file"], alt_labels=options["skill_embedding"] == "mean"),
+            model_name=options["model_name"],
+            skills_file=options["skills_file"],
+            cache=cache,
+            paper_store=paper_store,
+            search=options["search"],
+            backend=options["backend"],
+            skill_embedding=options["skill_embedding"],
+            model=options.get("model"),  # a picklable encoder object instead of loading model_name (tests, benchmarks)
+        )
+
+        papers = Paper.objects.all()
+        papers.query = pickle.loads(options["query"])
+        lo, hi = bounds
+        papers = papers.filter(id__gte=lo)
+        if hi is not None:
+            papers = papers.filter(id__lt=hi)
+
+        # materialize only the ids and load each batch with its own short query, so no read
+        # cursor stays open on SQLite while the parent commits
+        batch_size = options["batch_size"]
+        paper_ids = list(papers.order_by("id").values_list("id", flat=True))
+        for id_batch in chunked(paper_ids, batch_size):
+            batch = list(Paper.objects.filter(id__in=id_batch).order_by("id"))
+            batch_results = extractor.extract_batch(
+                batch,
+                author_name=options["author_name"],
+                top_k=options["top_k"],
+                batch_size=batch_size,
+                save_to_db=False,
+                min_confidence=options["min_confidence"],
+            )
+            embeddings = paper_store.drain() if paper_store is not None else []
+            processed = [(paper.id, paper.abstract_hash) for paper in batch]
+            results.put(("batch", shard_index, (batch_results, embeddings, processed)))
+
+        connections.close_all()
+        results.put(("done", shard_index, paper_store.stats() if paper_store is not None else None))
+    except Exception:
+        results.put(("error", shard_index, traceback.format_exc()))
+
+
+def extract_sharded(papers, workers, options, writer, paper_store=None, progress=None):
+    """
+    Run extraction in `workers` spawned processes, one id-range shard each.
+    Workers only read; every write goes through `writer` (and `paper_store`) in this process,
+    so SQLite sees a single writer.
+    """
+    from django.db import connections
+
+    shards = shard_bounds(papers, workers)
+    options = dict(options)
+    options["query"] = pickle.dumps(papers.query)
+    options["settings_module"] = os.environ["DJANGO_SETTINGS_MODULE"]
+    options["threads"] = max(1, (os.cpu_count() or 1) // len(shards))
+
+    # spawn rather than fork: the parent may already hold torch threads and DB connections
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue(maxsize=len(shards) * 4)
+    connections.close_all()
+    processes = [
+        ctx.Process(target=_run_shard, args=(i, bounds, options, results), daemon=True)
+        for i, bounds in enumerate(shards)
+    ]
+    for p in processes:
+        p.start()
+
+    processed = 0
+    running = set(range(len(processes)))
+    try:
+        while running:
+            try:
+                kind, shard_index, payload = results.get(timeout=5)
+            except queue.Empty:
+                dead = [i for i in running if not processes[i].is_alive()]
+                if dead:
+                    raise RuntimeError(f"extraction worker(s) {dead} exited without finishing")
+                continue
+
+            if kind == "batch":
+                batch_results, embeddings, processed_papers = payload
+                writer.add(batch_results, processed=processed_papers)
+                count = len(processed_papers)
+                if paper_store is not None and embeddings:
+                    paper_store.write(embeddings)
+                processed += count
+                if progress is not None:
+                    progress.update(count)
+            elif kind == "done":
+                running.discard(shard_index)
+                if paper_store is not None and payload:
+                    paper_store.hits += payload["hits"]
+                    paper_store.misses += payload["misses"]
+                    paper_store.stale += payload["stale"]
+            else:
+                raise RuntimeError(f"extraction worker {shard_index} failed:\n{payload}")
+    finally:
+        for p in processes:
+            if p.is_alive() and running:
+                p.terminate()
+            p.join()
+    return processed
@@ -1,74 +1,231 @@
-import os
-import json
-import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
-from api.models import ExtractedSkill
+from itertools import islice
+from django.db import transaction
+from api.models import ExtractedSkill, ExtractedPaper
+from api.services.skill_profiles import refresh_profiles_for_papers
+from api.services.skill_search import build_skill_search, recall_at_k
+from api.services.model_backends import load_model, model_tag
+from api.services.skill_taxonomy import SkillTaxonomy, load_taxonomy
+from api.services import metrics
+from api.services.response_cache import bump_data_version
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 def load_skill(file_path):
-    if not os.path.exists:
-        raise FileNotFoundError(f"not found dataset file: {file_path}")
-    
-    ext = os.path.splitext(file_path)[-1].lower()
-    
-    if ext == ".csv":
-        df = pd.read_csv(file_path)
-        col_candidates = [c for c in df.columns if c.lower() in ("preferredlabel", "skill_name")]
-        if not col_candidates:
-            raise ValueError("not found candidates column")
-        skills = df[col_candidates[0]].dropna().unique().tolist()
-        
-    elif ext == ".json":
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, list):
-            skills = [d.get("preferredLabel") or d.get("skill_name") for d in data if isinstance(d, dict)]
-            skills = [s for s in skills if s]
-        else:
-            raise ValueError("json structure is not valid")
+    # labels only; use load_taxonomy() to keep URIs and alt labels as well
+    return load_taxonomy(file_path, alt_labels=False).labels
+
+class SkillExtractor:
+    def __init__(self, skill_list, model_name = "all-MiniLM-L6-v2", skills_file=None, cache=None, paper_store=None, search="exact", model=None, backend="torch", skill_embedding="label"):
+        self.base_model_name = model_name
+        self.backend = backend
+        # results, cached skill embeddings and stored abstract embeddings are all keyed by this tag
+        self.model_name = model_tag(model_name, backend)
+        # skill_list is a plain list of labels or a SkillTaxonomy (labels + URIs + alt labels)
+        self.taxonomy = skill_list if isinstance(skill_list, SkillTaxonomy) else None
+        self.skill_list = self.taxonomy.labels if self.taxonomy is not None else skill_list
+        self.skill_uris = self.taxonomy.uris if self.taxonomy is not None else [None] * len(skill_list)
+        if skill_embedding == "mean" and self.taxonomy is None:
+            raise ValueError("mean skill embeddings need a SkillTaxonomy with alt labels (see load_taxonomy)")
+        self.skill_embedding = skill_embedding
+        # any object with SentenceTransformer's encode()/device can stand in (e.g. the benchmark's stub encoder)
+        self.model = model if model is not None else load_model(model_name, backend)
+        self.cache = cache
+        self.paper_store = paper_store
 
-    else:
-        raise ValueError("only csv or json")
+        index_path = None
+        if cache is None:
+            embeddings = self.encode_skills(skill_list)
+        else:
+            key = cache.key(self.model_name, skill_list, skills_file, mode=skill_embedding)
+            embeddings = cache.get_or_build(self.model_name, skill_list, self.encode_skills, key=key)
+            index_path = cache.index_path(key, search)
+            print(f"Skill embedding cache: {cache.hits} hit, {cache.misses} miss ({cache.cache_dir})")
+        self.skill_embeddings = embeddings
+        # on CPU the exact search keeps using the (cached, mmapped) matrix without copying it
+        self.search = build_skill_search(search, embeddings, index_path=index_path, device=self.model.device)
+        print(f"Skill embedding ready ({self.search.name} search).")
 
-    print(f"load skill {len(skills):,} record")
-    return skills
+    def _encode_labels(self, texts):
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
 
-class SkillExtractor:
-    def __init__(self, skill_list, model_name = "all-MiniLM-L6-v2"):
-        self.model_name = model_name
-        self.skill_list = skill_list
-        self.model = SentenceTransformer(model_name)
-        
+    def encode_skills(self, skill_list):
         print(f"Generate embedding for {len(skill_list)} skills...")
-        self.skill_embeddings = self.model.encode(skill_list, convert_to_tensor=True)
-        print("Skill embedding ready.")
+        if self.skill_embedding == "mean":
+            return self.taxonomy.mean_embeddings(self._encode_labels)
+        return self._encode_labels(list(skill_list))
+
+    def search_recall(self, papers, top_k = 5):
+        # recall of the configured search backend against an exact scan, on a sample of papers
+        papers = [paper for paper in papers if paper.abstract]
+        if self.search.name == "exact" or not papers:
+            return 1.0
+        queries = self.encode_abstracts(papers)
+        exact = build_skill_search("exact", self.skill_embeddings, device=self.model.device)
+        return recall_at_k(exact, self.search, queries, top_k)
+
+    def _encode_texts(self, texts, batch_size):
+        with metrics.timer("embedding_batch_seconds", model=self.model_name):
+            embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        metrics.observe("embedding_batch_size", len(texts), buckets=(1, 8, 16, 32, 64, 128, 256, 512, 1024), model=self.model_name)
+        return embeddings
+
+    def encode_abstracts(self, papers, batch_size = 64):
+        import numpy as np
+
+        if self.paper_store is None:
+            return self._encode_texts([paper.abstract for paper in papers], batch_size)
+
+        # only papers that are new or whose abstract changed go through the model
+        stored = self.paper_store.get_many(papers)
+        missing = [paper for paper in papers if paper.id not in stored]
+        if missing:
+            new_embs = self._encode_texts([paper.abstract for paper in missing], batch_size)
+            self.paper_store.put_many(missing, new_embs)
+            stored.update(zip((paper.id for paper in missing), new_embs))
+        return np.stack([stored[paper.id] for paper in papers])
         
+    def rank_texts(self, texts, top_k = 5, batch_size = 64, min_confidence=None):
+        # free text in, [[{"skill_name", "skill_uri", "confidence"}, ...] per text] out; nothing is stored
+        if not texts:
+            return []
+        text_embs = self._encode_texts(texts, batch_size)
+        top_scores, top_indices = self.search.search(text_embs, top_k, min_confidence=min_confidence)
+        return [
+            [
+                {"skill_name": self.skill_list[idx], "skill_uri": self.skill_uris[idx], "confidence": confidence}
+                for idx, confidence in zip(indices, scores)
+            ]
+            for scores, indices in zip(top_scores, top_indices)
+        ]
+
     def extract_from_text(self, paper, author_name = None, top_k = 5, save_to_db=True):
         if not paper.abstract:
             return []
-        
-        text_emb = self.model.encode(paper.abstract, convert_to_tensor=True)
-        cos_scores = util.cos_sim(text_emb, self.skill_embeddings)[0]
-        top_results = np.argpartition(-cos_scores, range(top_k))[:top_k]
-        
-        extracted = []
-        for idx in top_results:
-            skill_name = self.skill_list[idx]
-            confidence = float(cos_scores[idx])
-            extracted.append({
-                "paper_id": paper.id,
-                "author_name": author_name,
-                "skill_name": skill_name,
-                "confidence": confidence,
-                "model": self.model_name,
-            })
-            
-            if save_to_db:
-                ExtractedSkill.objects.create(
-                    paper=paper,
-                    author_name=author_name,
-                    skill_name=skill_name,
-                    confidence=confidence,
-                    embedding_model=self.model_name
-                )
-        return sorted(extracted, key=lambda x: x["confidence"], reverse=True)
\ No newline at end of file
+        return self.extract_batch([paper], author_name=author_name, top_k=top_k, save_to_db=save_to_db)[0]
+
+    def extract_batch(self, papers, author_name = None, top_k = 5, batch_size = 64, save_to_db=True, min_confidence=None):
+        # one encode call and one papers x skills similarity matrix for the whole batch
+        results = [[] for _ in papers]
+        rows = [i for i, paper in enumerate(papers) if paper.abstract]
+        if not rows:
+            return results
+
+        text_embs = self.encode_abstracts([papers[i] for i in rows], batch_size=batch_size)
+        metrics.inc("papers_extracted_total", len(rows), model=self.model_name)
+        top_scores, top_indices = self.search.search(text_embs, top_k, min_confidence=min_confidence)
+
+        for row, scores, indices in zip(rows, top_scores, top_indices):
+            paper = papers[row]
+            for idx, confidence in zip(indices, scores):
+                results[row].append({
+                    "paper_id": paper.id,
+                    "author_name": author_name,
+                    "skill_name": self.skill_list[idx],
+                    "skill_uri": self.skill_uris[idx],
+                    "confidence": confidence,
+                    "model": self.model_name,
+                })
+
+        if save_to_db:
+            with ExtractedSkillWriter() as batch_writer:
+                batch_writer.add(results)
+
+        # both search backends return each row sorted by confidence, highest first
+        return results
+
+
+
+class ExtractedSkillWriter:
+    """Buffers extraction results and writes them with bulk_create, one transaction per flush."""
+
+    def __init__(self, flush_every = 500, replace = False, db_batch_size = 1000, update_profiles = True, run = None):
+        self.flush_every = flush_every  # number of papers per flush
+        self.run = run  # ExtractionRun: processed papers get a marker so the next run can skip them
+        # a paper re-done for a run (new config or changed abstract) must lose its old rows
+        self.replace = replace or run is not None  # delete old rows for the same paper and model before inserting
+        self.db_batch_size = db_batch_size
+        self.update_profiles = update_profiles  # refresh AuthorSkillProfile for the authors of flushed papers
+        self.written = 0
+        self._papers = {}  # paper_id -> model
+        self._rows = []
+        self._markers = []
+
+    def add(self, results, processed=()):
+        # results is one list of skill dicts per paper, as returned by extract_batch;
+        # processed is (paper_id, abstract_hash) for every paper of the batch, with or without skills
+        for paper_results in results:
+            if not paper_results:
+                continue
+            self._papers[paper_results[0]["paper_id"]] = paper_results[0]["model"]
+            for r in paper_results:
+                self._rows.append(ExtractedSkill(
+                    paper_id=r["paper_id"],
+                    author_name=r["author_name"],
+                    skill_name=r["skill_name"],
+                    skill_uri=r.get("skill_uri"),
+                    confidence=r["confidence"],
+                    embedding_model=r["model"],
+                ))
+        if self.run is not None:
+            for paper_id, digest in processed:
+                self._papers.setdefault(paper_id, self.run.embedding_model)
+                self._markers.append(ExtractedPaper(run=self.run, paper_id=paper_id, abstract_hash=digest))
+        if len(self._papers) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._rows and not self._markers:
+            return 0
+        with metrics.timer("db_write_seconds", table="extracted_skill"), transaction.atomic():
+            if self.replace:
+                by_model = {}
+                for paper_id, model in self._papers.items():
+                    by_model.setdefault(model, []).append(paper_id)
+                for model, paper_ids in by_model.items():
+                    # keep each IN (...) under SQLite's bound-parameter limit
+                    for i in range(0, len(paper_ids), 500):
+                        ExtractedSkill.objects.filter(
+                            embedding_model=model, paper_id__in=paper_ids[i:i + 500]
+                        ).delete()
+            ExtractedSkill.objects.bulk_create(self._rows, batch_size=self.db_batch_size)
+            if self._markers:
+                self._write_markers()
+            if self.update_profiles:
+                refresh_profiles_for_papers(set(self._papers), models=set(self._papers.values()))
+            if self._rows or self.replace:
+                bump_data_version()  # cached API reads of papers and skills are stale once this commits
+        count = len(self._rows)
+        metrics.inc("db_rows_written_total", count, table="extracted_skill")
+        self.written += count
+        self._papers = {}
+        self._rows = []
+        self._markers = []
+        return count
+
+    def _write_markers(self):
+        # the rows of this model now come from self.run, so markers of its other runs no longer hold
+        paper_ids = [marker.paper_id for marker in self._markers]
+        for i in range(0, len(paper_ids), 500):
+            ExtractedPaper.objects.filter(
+                paper_id__in=paper_ids[i:i + 500], run__embedding_model=self.run.embedding_model
+            ).exclude(run=self.run).delete()
+        ExtractedPaper.objects.bulk_create(
+            self._markers,
+            batch_size=self.db_batch_size,
+            update_conflicts=True,
+            unique_fields=["run", "paper"],
+            update_fields=["abstract_hash", "processed_at"],
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from api.models import AuthorSkillProfile, ExtractedSkill, PaperAuthor
+
+
+def authors_for_papers(paper_ids, db_batch_size=500):
+    paper_ids = list(paper_ids)
+    author_ids = set()
+    for i in range(0, len(paper_ids), db_batch_size):
+        author_ids.update(
+            PaperAuthor.objects.filter(paper_id__in=paper_ids[i:i + db_batch_size]).values_list("author_id", flat=True)
+        )
+    return author_ids
+
+
+def refresh_author_profiles(author_ids, models=None, db_batch_size=200):
+    """
+    Recompute the AuthorSkillProfile rows of these authors (optionally only for some embedding models)
+    with one GROUP BY over just their papers. Returns the number of profile rows written.
+    """
+    author_ids = list(author_ids)
+    written = 0
+    with transaction.atomic():
+        for i in range(0, len(author_ids), db_batch_size):
+            chunk = author_ids[i:i + db_batch_size]
+            profiles = AuthorSkillProfile.objects.filter(author_id__in=chunk)
+            skills = ExtractedSkill.objects.filter(paper__authorships__author_id__in=chunk)
+            if models is not None:
+                profiles = profiles.filter(embedding_model__in=list(models))
+                skills = skills.filter(embedding_model__in=list(models))
+            profiles.delete()
+
+            rows = (
+                skills.values("paper__authorships__author_id", "embedding_model", "skill_name")
+                .annotate(
+                    paper_count=Count("paper", distinct=True),
+                    mean_confidence=Avg("confidence"),
+                    max_confidence=Max("confidence"),
+                    first_year=Min("paper__year"),
+                    last_year=Max("paper__year"),
+                )
+                .order_by()
+            )
+            new_profiles = [
+                AuthorSkillProfile(
+                    author_id=row["paper__authorships__author_id"],
+                    embedding_model=row["embedding_model"],
+                    skill_name=row["skill_name"],
+                    paper_count=row["paper_count"],
+                    mean_confidence=row["mean_confidence"] or 0.0,
+                    max_confidence=row["max_confidence"] or 0.0,
+                    first_year=row["first_year"],
+                    last_year=row["last_year"],
+                )
+                for row in rows
+            ]
+            AuthorSkillProfile.objects.bulk_create(new_profiles, batch_size=500)
+            written += len(new_profiles)
+    return written
+
+
+def refresh_profiles_for_papers(paper_ids, models=None):
+    return refresh_author_profiles(authors_for_papers(paper_ids), models=models)
@@ -0,0 +1,109 @@
+import os
+
+# numpy and torch are imported inside the functions that use them, so importing this module
+# (e.g. for SEARCH_BACKENDS in a command's argument parser) stays cheap
+
+SEARCH_BACKENDS = ("exact", "hnsw")
+
+
+def normalize_rows(matrix):
+    import numpy as np
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def is_normalized(matrix, sample=256):
+    import numpy as np
+
+    norms = np.linalg.norm(np.asarray(matrix[:sample], dtype=np.float32), axis=1)
+    return bool(np.allclose(norms, 1.0, atol=1e-3))
+
+
+def _apply_min_confidence(scores, indices, min_confidence):
+    if min_confidence is None:
+        return scores, indices
+    kept_scores, kept_indices = [], []
+    for row_scores, row_indices in zip(scores, indices):
+        keep = [i for i, s in enumerate(row_scores) if s >= min_confidence]
+        kept_scores.append([row_scores[i] for i in keep])
+        kept_indices.append([row_indices[i] for i in keep])
+    return kept_scores, kept_indices
+
+
+class ExactSkillSearch:
+    """Brute-force cosine search: one GEMM against the normalized skill matrix and torch.topk per batch."""
+
+    name = "exact"
+
+    def __init__(self, embeddings, device="cpu"):
+        import torch
+
+        # cached matrices are already normalized, and then the mmap is used as-is without a copy
+        if not is_normalized(embeddings):
+            embeddings = normalize_rows(embeddings)
+        self.matrix = torch.from_numpy(embeddings).to(device)
+        self.size = self.matrix.shape[0]
+
+    def search(self, queries, top_k, min_confidence=None):
+        import torch
+
+        queries = torch.from_numpy(normalize_rows(queries)).to(self.matrix.device)
+        scores = queries @ self.matrix.T
+        top_scores, top_indices = scores.topk(min(top_k, self.size), dim=1)
+        return _apply_min_confidence(top_scores.cpu().tolist(), top_indices.cpu().tolist(), min_confidence)
+
+
+class HnswSkillSearch:
+    """Approximate inner-product search over an HNSW index persisted next to the cached embeddings."""
+
+    name = "hnsw"
+
+    def __init__(self, embeddings, index_path=None, m=32, ef_construction=200, ef=128):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("the hnsw skill search needs the hnswlib package (pip install hnswlib)")
+
+        import numpy as np
+
+        self.size, dim = embeddings.shape
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        if index_path and os.path.exists(index_path):
+            self.index.load_index(index_path, max_elements=self.size)
+        else:
+            self.index.init_index(max_elements=self.size, ef_construction=ef_construction, M=m)
+            self.index.add_items(normalize_rows(embeddings), np.arange(self.size))
+            if index_path:
+                tmp_path = f"{index_path}.{os.getpid()}.tmp"
+                self.index.save_index(tmp_path)
+                os.replace(tmp_path, index_path)
+        self.index.set_ef(max(ef, 1))
+
+    def search(self, queries, top_k, min_confidence=None):
+        k = min(top_k, self.size)
+        self.index.set_ef(max(self.index.ef, k))
+        import numpy as np
+
+        labels, distances = self.index.knn_query(normalize_rows(queries), k=k)
+        # hnswlib's "ip" distance is 1 - dot product
+        scores = (1.0 - distances).tolist()
+        return _apply_min_confidence(scores, labels.astype(np.int64).tolist(), min_confidence)
+
+
+def build_skill_search(kind, embeddings, index_path=None, device="cpu"):
+    if kind == "exact":
+        return ExactSkillSearch(embeddings, device=device)
+    if kind == "hnsw":
+        return HnswSkillSearch(embeddings, index_path=index_path)
+    raise ValueError(f"unknown skill search backend: {kind} (choose from {', '.join(SEARCH_BACKENDS)})")
+
+
+def recall_at_k(exact, approx, queries, top_k):
+    """Share of the exact top-k skills that the approximate backend also returns."""
+    _, exact_indices = exact.search(queries, top_k)
+    _, approx_indices = approx.search(queries, top_k)
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact_indices, approx_indices))
+    total = sum(len(e) for e in exact_indices)
+    return hits / total if total else 1.0
@@ -0,0 +1,188 @@
+import os
+import csv
+import json
+from array import array
+from api.services.embedding_cache import normalize_skill
+
+SKILL_EMBEDDING_MODES = ("label", "mean")
+
+# header names are matched case-insensitively; the first one present wins
+LABEL_COLUMNS = ("preferredlabel", "skill_name", "label", "element name")
+URI_COLUMNS = ("concepturi", "skill_uri", "uri", "element id")
+ALT_LABEL_COLUMNS = ("altlabels", "alt_labels", "altlabel")
+
+
+def split_alt_labels(value):
+    # ESCO puts one alt label per line inside the cell; other exports use "|"
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace("|", "\n").split("\n")
+    return [label.strip() for label in value if label and str(label).strip()]
+
+
+def _first_char(f):
+    while True:
+        ch = f.read(1)
+        if not ch or not ch.isspace():
+            return ch
+
+
+def iter_json_records(f, chunk_size=1 << 16):
+    """
+    Yield the items of a top-level JSON array one at a time while reading the file in chunks,
+    so a large taxonomy is never held as one parsed document. Anything else is read as JSON Lines.
+    """
+    if _first_char(f) != "[":
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    buf, eof = "", False
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(","):
+            buf = buf[1:].lstrip()
+        if buf.startswith("]"):
+            return
+        if buf:
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                end = None
+            # a value that runs to the end of the buffer may be cut off (e.g. a number), so read on first
+            if end is not None and (end < len(buf) or eof):
+                yield item
+                buf = buf[end:]
+                continue
+        if eof:
+            raise ValueError("json structure is not valid")
+        more = f.read(chunk_size)
+        eof = not more
+        buf += more
+
+
+def _pick(columns, candidates):
+    for name in candidates:
+        if name in columns:
+            return columns[name]
+    return None
+
+
+def iter_skill_records(file_path):
+    """Yield (label, uri, alt_labels) from an ESCO/O*NET-style CSV/TSV or a JSON array / JSON Lines file."""
+    ext = os.path.splitext(file_path)[-1].lower()
+
+    if ext in (".csv", ".tsv", ".txt"):
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f, delimiter="," if ext == ".csv" else "\t")
+            header = next(reader, [])
+            columns = {}
+            for i, name in enumerate(header):
+                columns.setdefault(name.strip().lower(), i)
+            label_col = _pick(columns, LABEL_COLUMNS)
+            if label_col is None:
+                raise ValueError("not found candidates column")
+            uri_col = _pick(columns, URI_COLUMNS)
+            alt_col = _pick(columns, ALT_LABEL_COLUMNS)
+            for row in reader:
+                if label_col >= len(row) or not row[label_col].strip():
+                    continue
+                uri = row[uri_col].strip() if uri_col is not None and uri_col < len(row) else None
+                alts = split_alt_labels(row[alt_col]) if alt_col is not None and alt_col < len(row) else []
+                yield row[label_col], uri or None, alts
+
+    elif ext in (".json", ".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for d in iter_json_records(f):
+                if not isinstance(d, dict):
+                    raise ValueError("json structure is not valid")
+                fields = {k.lower(): v for k, v in d.items()}
+                label = _pick(fields, LABEL_COLUMNS)
+                if label:
+                    yield str(label), _pick(fields, URI_COLUMNS) or None, split_alt_labels(_pick(fields, ALT_LABEL_COLUMNS))
+
+    else:
+        raise ValueError("only csv or json")
+
+
+class SkillTaxonomy:
+    """
+    Skills stored column-wise: labels and uris are parallel lists, and all alt labels live in one flat
+    list sliced by alt_offsets, so per-skill overhead is a few list slots instead of a dict or DataFrame row.
+    Iterating or indexing a taxonomy gives its labels, so it can stand in for a plain skill list.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self.uris = []
+        self.alt_labels = []
+        self.alt_offsets = array("L", [0])
+        self.duplicates = 0
+        self._seen = set()
+
+    def add(self, label, uri=None, alt_labels=()):
+        # dedup on the normalized label: the first record wins
+        key = normalize_skill(label)
+        if not key:
+            return False
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        alts = [a for a in dict.fromkeys(alt_labels) if normalize_skill(a) != key]
+        self.labels.append(label.strip())
+        self.uris.append(uri)
+        self.alt_labels.extend(alts)
+        self.alt_offsets.append(len(self.alt_labels))
+        return True
+
+    def alt_labels_of(self, i):
+        return self.alt_labels[self.alt_offsets[i]:self.alt_offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __getitem__(self, i):
+        return self.labels[i]
+
+    def mean_embeddings(self, encode, chunk_size=1024):
+        """One row per skill: the normalized mean of its label and alt-label embeddings, built chunk by chunk."""
+        import numpy as np
+        from api.services.skill_search import normalize_rows
+
+        out = None
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            texts, counts = [], []
+            for i in range(start, stop):
+                alts = self.alt_labels_of(i)
+                texts.append(self.labels[i])
+                texts.extend(alts)
+                counts.append(1 + len(alts))
+            embs = np.asarray(encode(texts), dtype=np.float32)
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            means = np.add.reduceat(embs, offsets, axis=0) / np.asarray(counts, dtype=np.float32)[:, None]
+            if out is None:
+                out = np.empty((len(self), embs.shape[1]), dtype=np.float32)
+            out[start:stop] = normalize_rows(means)
+        return out if out is not None else np.zeros((0, 0), dtype=np.float32)
+
+
+def load_taxonomy(file_path, alt_labels=True):
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"not found dataset file: {file_path}")
+
+    taxonomy = SkillTaxonomy()
+    for label, uri, alts in iter_skill_records(file_path):
+        taxonomy.add(label, uri, alts if alt_labels else ())
+
+    print(f"load skill {len(taxonomy):,} record ({taxonomy.duplicates:,} duplicate labels skipped)")
+    return taxonomy
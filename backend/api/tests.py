@@ -1,3 +1,1395 @@
-from django.test import TestCase
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import functools
+from unittest import mock
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import ScopedRateThrottle
 
-# Create your tests here.
+from api.services.crossref import CrossRefClient
+from api.services.http_cache import ResponseCache
+from api.services import response_cache
+from datetime import timedelta
+from django.utils import timezone
+from api.models import Author, AuthorSkillProfile, ExtractedPaper, ExtractedSkill, ExtractionJob, IngestJob, Paper, PaperAuthor, abstract_hash
+from api.services import extractor_service, metrics
+from api.services.benchmark import HashingEncoder
+from api.services.embedding_cache import PaperEmbeddingStore, SkillEmbeddingCache
+from api.services.extraction_runs import get_run, pending_papers, run_for_extractor, skills_fingerprint
+from api.services.extraction_jobs import JobProgress, claim_job, release_jobs, requeue_stale_jobs, run_job
+from api.services.model_backends import load_model, model_tag, topk_agreement
+from api.management.commands.import_time import parse_importtime
+from api.services.pipeline import ExtractionPipeline
+from api.services.ingest import already_enriched, checkpoint_ingest_job, save_papers, start_ingest_job
+from api.services.sharded_extraction import extract_sharded, shard_bounds
+from api.services.skill_extraction import ExtractedSkillWriter, SkillExtractor
+from api.services.skill_search import build_skill_search, recall_at_k
+from api.services.skill_taxonomy import iter_json_records, load_taxonomy
+from api.services.semantic_scholar import SemanticScholarClient
+
+
+class StubS2Handler(BaseHTTPRequestHandler):
+    # class-level state, reset by each test
+    requests_seen = []
+    fail_first = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubS2Handler.requests_seen.append(body["ids"])
+        if StubS2Handler.fail_first > 0:
+            StubS2Handler.fail_first -= 1
+            self._send(429, {"message": "Too Many Requests"}, {"Retry-After": "0"})
+            return
+        papers = [
+            None if i.endswith("missing") else {"abstract": f"abstract of {i}", "fieldsOfStudy": ["CS"], "citationCount": 3}
+            for i in body["ids"]
+        ]
+        self._send(200, papers)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class SemanticScholarClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubS2Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/graph/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubS2Handler.requests_seen = []
+        StubS2Handler.fail_first = 0
+
+    def make_client(self, **kwargs):
+        kwargs.setdefault("rate", 1000)
+        return SemanticScholarClient(base_url=self.base_url, **kwargs)
+
+    def test_enrich_splits_into_batches(self):
+        dois = [f"10.1/{i}" for i in range(5)] + ["10.1/missing"]
+        found = self.make_client(batch_size=2, concurrency=3).enrich(dois)
+
+        self.assertEqual(sorted(len(ids) for ids in StubS2Handler.requests_seen), [2, 2, 2])
+        self.assertEqual(len(found), 5)
+        self.assertNotIn("10.1/missing", found)
+        self.assertEqual(found["10.1/0"]["citation_count"], 3)
+        self.assertEqual(found["10.1/0"]["fields_of_study"], "CS")
+
+    def test_retries_after_429(self):
+        StubS2Handler.fail_first = 2
+        found = self.make_client().enrich(["10.1/A"])
+
+        self.assertEqual(len(StubS2Handler.requests_seen), 3)
+        self.assertIn("10.1/a", found)
+
+    def test_gives_up_after_retries(self):
+        StubS2Handler.fail_first = 10
+        client = self.make_client(retries=1)
+
+        self.assertEqual(client.enrich(["10.1/A"]), {})
+        self.assertEqual(client.failed_batches, 1)
+
+
+class StubResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+
+class StubCrossRefSession:
+    """Serves `pages` cursor by cursor ("*", "c1", "c2", ...) and records every request."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.cursors = []
+
+    def request(self, method, url, timeout=None, params=None, **kwargs):
+        self.cursors.append(params["cursor"])
+        index = 0 if params["cursor"] == "*" else int(params["cursor"][1:])
+        items = self.pages[index] if index < len(self.pages) else []
+        return StubResponse({"message": {"items": items, "next-cursor": f"c{index + 1}", "total-results": 5}})
+
+
+class CrossRefClientTests(SimpleTestCase):
+    def test_iter_pages_follows_cursors_and_always_hits_the_network(self):
+        session = StubCrossRefSession([[{"DOI": "1"}, {"DOI": "2"}], [{"DOI": "3"}, {"DOI": "4"}], [{"DOI": "5"}]])
+        client = CrossRefClient(rows=2, rate=1000, session=session)
+
+        for _ in range(2):
+            pages = list(client.iter_pages({"query": "x"}))
+            self.assertEqual([cursor for cursor, _ in pages], ["*", "c1", "c2"])
+            self.assertEqual(sum(len(message["items"]) for _, message in pages), 5)
+        # the short last page ends the harvest without asking for c3; nothing is replayed from a cache
+        self.assertEqual(session.cursors, ["*", "c1", "c2"] * 2)
+
+    def test_next_page_is_fetched_while_the_current_one_is_processed(self):
+        session = StubCrossRefSession([[{"DOI": "1"}, {"DOI": "2"}], [{"DOI": "3"}, {"DOI": "4"}], [{"DOI": "5"}]])
+        pages = CrossRefClient(rows=2, rate=1000, session=session).iter_pages({})
+
+        cursor, first = next(pages)
+        deadline = time.monotonic() + 5
+        while len(session.cursors) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual((cursor, session.cursors), ("*", ["*", "c1"]))
+        pages.close()
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_roundtrip_and_ttl(self):
+        cache = ResponseCache(self.tmp.name, ttl=60)
+        key = cache.key("GET", "https://api.crossref.org/works", {"cursor": "*", "rows": 2})
+        self.assertIsNone(cache.get(key))
+
+        cache.set(key, 200, json.dumps({"message": {"items": []}}))
+        self.assertEqual(cache.get(key).json(), {"message": {"items": []}})
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+        cache.ttl = 0.01
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(key))
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(self.tmp.name, ttl=None, max_bytes=250)
+        cache.set("a", 200, b"x" * 100)
+        cache.set("b", 200, b"x" * 100)
+        cache.get("a")  # "b" is now the least recently used
+        cache.set("c", 200, b"x" * 100)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_hits_do_not_commit_on_every_lookup(self):
+        cache = ResponseCache(self.tmp.name, ttl=None, touch_every=3)
+        cache.set_many([(key, 200, b"x") for key in "abcd"])
+        other = sqlite3.connect(cache.path)
+        self.addCleanup(other.close)
+
+        def accessed():
+            return dict(other.execute("SELECT key, accessed FROM responses"))
+
+        before = accessed()
+        time.sleep(0.01)
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(accessed(), before)  # nothing committed yet
+        cache.get("c")  # the third hit writes the batch
+        after = accessed()
+        self.assertTrue(all(after[key] > before[key] for key in "abc"))
+
+        cache.get("d")
+        cache.close()
+        self.assertGreater(accessed()["d"], before["d"])
+
+    def test_s2_replays_from_cache_without_network(self):
+        cache = ResponseCache(self.tmp.name)
+        # nothing listens on this port, so any real request would fail
+        client = SemanticScholarClient(base_url="http://127.0.0.1:9/graph/v1", rate=1000, retries=0, cache=cache)
+        cache.set_many([
+            (client._cache_key("10.1/A"), 200, json.dumps({"abstract": "cached", "citationCount": 7})),
+            (client._cache_key("10.1/B"), 200, "null"),
+        ])
+
+        found = client.enrich(["10.1/A", "10.1/B"])
+
+        self.assertEqual(found, {"10.1/a": {"abstract": "cached", "fields_of_study": "", "citation_count": 7}})
+        self.assertEqual(client.failed_batches, 0)
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """Readers and a bulk writer on one file with the settings.SQLITE_PRAGMAS profile, as ingest + API run together."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "stress.sqlite3")
+        conn = self.connect()
+        conn.execute("CREATE TABLE paper (id INTEGER PRIMARY KEY, doi TEXT UNIQUE, abstract TEXT)")
+        conn.close()
+
+    def connect(self):
+        # autocommit mode so transactions are opened explicitly, like Django's IMMEDIATE transaction_mode
+        conn = sqlite3.connect(self.path, timeout=20, isolation_level=None, check_same_thread=False)
+        for pragma in settings.SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def test_readers_and_bulk_writer_without_lock_errors(self):
+        batches, batch_size, readers = 40, 500, 4
+        errors, reads = [], []
+        writing = threading.Event()
+        writing.set()
+
+        def write(writer_id):
+            conn = self.connect()
+            try:
+                for b in range(batches):
+                    rows = [(f"10.1/{writer_id}.{b}.{i}", "x" * 200) for i in range(batch_size)]
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany("INSERT INTO paper (doi, abstract) VALUES (?, ?)", rows)
+                    conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                errors.append(e)
+            finally:
+                conn.close()
+
+        def read():
+            conn = self.connect()
+            count = 0
+            try:
+                while writing.is_set():
+                    conn.execute("SELECT COUNT(*), MAX(id) FROM paper").fetchone()
+                    conn.execute("SELECT id, doi FROM paper ORDER BY id DESC LIMIT 50").fetchall()
+                    count += 1
+            except sqlite3.Error as e:
+                errors.append(e)
+            finally:
+                reads.append(count)
+                conn.close()
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        # two writers: the second one has to wait on busy_timeout instead of failing
+        writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(2)]
+        for t in reader_threads + writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        writing.clear()
+        for t in reader_threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(count > 0 for count in reads))
+        conn = self.connect()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM paper").fetchone()[0], 2 * batches * batch_size)
+        conn.close()
+
+
+class DatabaseAliasTests(TransactionTestCase):
+    """The configured default/read aliases through the ORM, on the (file-based) test database."""
+
+    databases = {"default", "read"}
+
+    def test_default_is_wal_with_immediate_transactions(self):
+        with connections["default"].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+        # BEGIN IMMEDIATE takes the write lock before the first statement, even a read
+        other = sqlite3.connect(connections["default"].settings_dict["NAME"], timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic():
+            Paper.objects.count()
+            with self.assertRaisesMessage(sqlite3.OperationalError, "locked"):
+                other.execute("BEGIN IMMEDIATE")
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+
+    def test_read_alias_sees_commits_and_rejects_writes(self):
+        Paper.objects.create(title="T", authors="A", doi="10.1/read")
+        self.assertEqual(list(Paper.objects.using("read").values_list("doi", flat=True)), ["10.1/read"])
+
+        with self.assertRaisesMessage(OperationalError, "readonly"):
+            with transaction.atomic(using="read"):
+                Paper.objects.using("read").create(title="T", authors="A", doi="10.1/write")
+        self.assertFalse(Paper.objects.filter(doi="10.1/write").exists())
+
+    def test_api_gets_use_the_read_alias(self):
+        Paper.objects.create(title="T", authors="A", doi="10.1/routed")
+        with CaptureQueriesContext(connections["default"]) as default, CaptureQueriesContext(connections["read"]) as read:
+            response = APIClient().get("/api/paper/", format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertTrue(read.captured_queries)
+        self.assertFalse(default.captured_queries)
+
+
+class APIResponseCacheTests(SimpleTestCase):
+    def request(self, query):
+        return Request(APIRequestFactory().get("/api/papers/" + query))
+
+    def test_tests_never_touch_the_on_disk_cache(self):
+        self.assertEqual(caches["default"].__class__.__name__, "LocMemCache")
+
+    def test_key_ignores_param_order_and_follows_data_version(self):
+        version = response_cache.data_version()
+        self.assertEqual(version, response_cache.data_version())
+
+        key = response_cache.response_key(self.request("?year=2020&page_size=5"), "PaperViewSet.list", version)
+        same = response_cache.response_key(self.request("?page_size=5&year=2020"), "PaperViewSet.list", version)
+        other = response_cache.response_key(self.request("?year=2021&page_size=5"), "PaperViewSet.list", version)
+        self.assertEqual(key, same)
+        self.assertNotEqual(key, other)
+
+        response_cache._bump()
+        self.assertNotEqual(version, response_cache.data_version())
+        self.assertNotEqual(key, response_cache.response_key(self.request("?year=2020&page_size=5"), "PaperViewSet.list", response_cache.data_version()))
+
+
+class CachedPaperListTests(TransactionTestCase):
+    # GETs go through the "read" alias, a second connection that only sees committed rows
+    databases = {"default", "read"}
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def record(self, doi):
+        return {"doi": doi, "title": f"Paper {doi}", "authors": "Ada Lovelace", "year": 2024}
+
+    def get_list(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.api.get("/api/paper/", format="json", **headers)
+
+    def test_revalidates_until_ingest_inserts_a_paper(self):
+        save_papers([self.record("10.1/a")])
+        first = self.get_list()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.data["results"]), 1)
+        self.assertEqual(self.get_list(first["ETag"]).status_code, 304)
+
+        # a plain insert (update_existing=False) must invalidate as well
+        self.assertEqual(save_papers([self.record("10.1/b")]), (1, 0))
+        second = self.get_list(first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(len(second.data["results"]), 2)
+
+    def test_api_writes_invalidate(self):
+        self.api.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        etag = self.get_list()["ETag"]
+
+        created = self.api.post("/api/paper/", self.record("10.1/c"), format="json")
+        self.assertEqual(created.status_code, 201)
+        listed = self.get_list(etag)
+        self.assertEqual(listed.status_code, 200)
+        self.assertEqual([p["doi"] for p in listed.data["results"]], ["10.1/c"])
+
+        self.assertEqual(self.api.delete(f"/api/paper/{created.data['id']}/").status_code, 204)
+        self.assertEqual(self.get_list(listed["ETag"]).data["results"], [])
+
+
+def skill_rows(paper, scores, model="test-model"):
+    # one paper's extract_batch result, {skill_name: confidence}
+    return [
+        {"paper_id": paper.id, "author_name": None, "skill_name": name, "skill_uri": None, "confidence": confidence, "model": model}
+        for name, confidence in scores.items()
+    ]
+
+
+class SkillProfileTests(TestCase):
+    def setUp(self):
+        save_papers([
+            {"doi": "10.1/a", "title": "A", "authors": "Ada Lovelace, Alan Turing", "year": 2020},
+            {"doi": "10.1/b", "title": "B", "authors": "ada  lovelace", "year": 2022},
+        ])
+        self.a = Paper.objects.get(doi="10.1/a")
+        self.b = Paper.objects.get(doi="10.1/b")
+        with ExtractedSkillWriter() as writer:
+            writer.add([
+                skill_rows(self.a, {"python": 0.8, "sql": 0.4}),
+                skill_rows(self.b, {"python": 0.6}),
+            ])
+
+    def profiles(self, name):
+        author = Author.objects.get(name_key=name)
+        return {
+            p.skill_name: (p.paper_count, round(p.mean_confidence, 6), p.max_confidence, p.first_year, p.last_year)
+            for p in AuthorSkillProfile.objects.filter(author=author)
+        }
+
+    def test_writer_refreshes_profiles(self):
+        self.assertEqual(self.profiles("ada lovelace"), {
+            "python": (2, 0.7, 0.8, 2020, 2022),
+            "sql": (1, 0.4, 0.4, 2020, 2020),
+        })
+        self.assertEqual(self.profiles("alan turing"), {
+            "python": (1, 0.8, 0.8, 2020, 2020),
+            "sql": (1, 0.4, 0.4, 2020, 2020),
+        })
+
+        # replace drops the paper's old rows before the profiles are recomputed
+        with ExtractedSkillWriter(replace=True) as writer:
+            writer.add([skill_rows(self.a, {"rust": 0.9})])
+        self.assertEqual(self.profiles("alan turing"), {"rust": (1, 0.9, 0.9, 2020, 2020)})
+        self.assertEqual(set(self.profiles("ada lovelace")), {"python", "rust"})
+
+    def test_rebuild_command_replaces_stale_rows_and_bumps_version(self):
+        turing = Author.objects.get(name_key="alan turing")
+        AuthorSkillProfile.objects.filter(author=turing).delete()
+        AuthorSkillProfile.objects.create(author=turing, embedding_model="test-model", skill_name="stale", paper_count=9)
+        AuthorSkillProfile.objects.create(author=turing, embedding_model="other-model", skill_name="kept", paper_count=1)
+        version = response_cache.data_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_skill_profiles", model="test-model", stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(set(self.profiles("alan turing")), {"python", "sql", "kept"})
+        self.assertEqual(self.profiles("ada lovelace")["python"], (2, 0.7, 0.8, 2020, 2022))
+        self.assertNotEqual(response_cache.data_version(), version)
+
+
+class ExtractionJobQueueTests(TestCase):
+    def test_claims_one_job_at_a_time(self):
+        first, second = (ExtractionJob.objects.create(kind="years") for _ in range(2))
+
+        self.assertEqual(claim_job("w1").id, first.id)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.started_at), ("queued", None))
+        self.assertEqual(claim_job("w2").id, second.id)
+        self.assertIsNone(claim_job("w3"))
+
+        self.assertEqual(release_jobs("w1"), 1)
+        self.assertEqual(claim_job("w3").id, first.id)
+
+    def test_requeues_on_missing_heartbeat_not_on_age(self):
+        for _ in range(2):
+            ExtractionJob.objects.create(kind="years")
+        long_running = claim_job("w1")
+        dead = claim_job("w2")
+        hours_ago = timezone.now() - timedelta(hours=2)
+        ExtractionJob.objects.filter(id__in=[long_running.id, dead.id]).update(started_at=hours_ago, heartbeat_at=hours_ago)
+
+        # a live worker saving progress keeps its job, however long it has been running
+        JobProgress(long_running).save()
+        self.assertEqual(requeue_stale_jobs(3600), 1)
+
+        long_running.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual((long_running.status, long_running.worker), ("running", "w1"))
+        self.assertEqual((dead.status, dead.worker, dead.heartbeat_at), ("queued", "", None))
+
+
+class StubRanker:
+    """rank_texts() stand-in: confidences 0.9, 0.8, ... per text; "boom" fails the whole call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def rank_texts(self, texts, top_k=5, batch_size=64, min_confidence=None):
+        self.calls.append((list(texts), top_k))
+        if "boom" in texts:
+            raise ValueError("boom")
+        return [
+            [{"skill_name": f"{text}-{i}", "skill_uri": None, "confidence": round(0.9 - i / 10, 2)} for i in range(top_k)]
+            for text in texts
+        ]
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def rank_concurrently(self, batcher, requests):
+        results = [None] * len(requests)
+
+        def rank(i, text, top_k, min_confidence):
+            try:
+                results[i] = batcher.rank(text, top_k=top_k, min_confidence=min_confidence, timeout=5)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=rank, args=(i, *r)) for i, r in enumerate(requests)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_requests_share_one_encode_call(self):
+        ranker = StubRanker()
+        batcher = extractor_service.MicroBatcher(ranker, max_batch=8, max_wait=0.5)
+
+        results = self.rank_concurrently(batcher, [("a", 1, None), ("b", 3, None), ("c", 3, 0.75)])
+
+        self.assertEqual(len(ranker.calls), 1)
+        self.assertEqual((sorted(ranker.calls[0][0]), ranker.calls[0][1]), (["a", "b", "c"], 3))
+        self.assertEqual([s["skill_name"] for s in results[0]], ["a-0"])
+        self.assertEqual(len(results[1]), 3)
+        self.assertEqual([s["confidence"] for s in results[2]], [0.9, 0.8])
+
+    def test_failure_reaches_every_caller_of_the_batch(self):
+        batcher = extractor_service.MicroBatcher(StubRanker(), max_batch=8, max_wait=0.5)
+
+        results = self.rank_concurrently(batcher, [("boom", 1, None), ("ok", 1, None)])
+
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(batcher.rank("ok", top_k=1, timeout=5)[0]["skill_name"], "ok-0")
+
+
+class ExtractorLoadFailureTests(SimpleTestCase):
+    def setUp(self):
+        for name in ("_extractor", "_batcher", "_load_error"):
+            patcher = mock.patch.object(extractor_service, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_failed_load_is_not_retried_on_every_request(self):
+        config = {**settings.SKILL_EXTRACTION, "SKILLS_FILE": "/nonexistent/skills.csv", "RETRY_LOAD_AFTER": 300}
+        with override_settings(SKILL_EXTRACTION=config), \
+                mock.patch("api.services.skill_taxonomy.load_taxonomy", side_effect=FileNotFoundError("no skills")) as load:
+            for _ in range(3):
+                with self.assertRaises(FileNotFoundError):
+                    extractor_service.get_extractor()
+            self.assertEqual(load.call_count, 1)
+
+            with override_settings(SKILL_EXTRACTION={**config, "RETRY_LOAD_AFTER": 0}):
+                with self.assertRaises(FileNotFoundError):
+                    extractor_service.get_extractor()
+            self.assertEqual(load.call_count, 2)
+
+
+class ExtractEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.extractor = SkillExtractor(
+            ["python programming", "relational databases sql", "protein folding"], model_name="stub", model=HashingEncoder(),
+        )
+
+    def setUp(self):
+        for name, value in (("_extractor", self.extractor), ("_batcher", extractor_service.MicroBatcher(self.extractor, max_wait=0))):
+            patcher = mock.patch.object(extractor_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.paper = Paper.objects.create(title="T", authors="A", doi="10.1/x", abstract="protein folding with deep learning")
+        self.api = APIClient()
+
+    def test_anonymous_requests_are_rejected(self):
+        self.assertIn(self.api.post("/api/extract/", {"text": "python"}, format="json").status_code, (401, 403))
+        self.assertIn(self.api.post(f"/api/paper/{self.paper.id}/extract_skills/", {}, format="json").status_code, (401, 403))
+
+    def test_ranks_text_and_paper_abstracts(self):
+        self.api.force_authenticate(User.objects.create_user("reader"))
+
+        response = self.api.post("/api/extract/", {"text": "python programming course", "top_k": 2}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["model"], self.extractor.model_name)
+        self.assertEqual([s["skill_name"] for s in response.data["matched_skills"]][0], "python programming")
+        self.assertEqual(len(response.data["matched_skills"]), 2)
+
+        response = self.api.post(f"/api/paper/{self.paper.id}/extract_skills/", {"top_k": 1}, format="json")
+        self.assertEqual(response.data["matched_skills"][0]["skill_name"], "protein folding")
+        self.assertFalse(ExtractedSkill.objects.exists())
+
+    def test_save_needs_permission(self):
+        self.api.force_authenticate(User.objects.create_user("reader"))
+        url = f"/api/paper/{self.paper.id}/extract_skills/"
+        self.assertEqual(self.api.post(url, {"save": True}, format="json").status_code, 403)
+
+        self.api.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        self.assertEqual(self.api.post(url, {"save": True, "top_k": 2}, format="json").status_code, 200)
+        self.assertEqual(ExtractedSkill.objects.filter(paper=self.paper).count(), 2)
+
+    def test_failed_model_load_is_a_503(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        skills_file = os.path.join(tmp.name, "skills.csv")
+        with open(skills_file, "w") as f:
+            f.write("label\npython programming\n")
+        self.api.force_authenticate(User.objects.create_user("reader"))
+
+        for error in (ImportError("the onnx backend needs optimum and onnxruntime"), OSError("can't load model files")):
+            with mock.patch.object(extractor_service, "_extractor", None), \
+                    mock.patch.object(extractor_service, "_batcher", None), \
+                    mock.patch.object(extractor_service, "_load_error", None), \
+                    override_settings(SKILL_EXTRACTION={**settings.SKILL_EXTRACTION, "SKILLS_FILE": skills_file}), \
+                    mock.patch("api.services.skill_extraction.load_model", side_effect=error):
+                for url, data in (("/api/extract/", {"text": "python"}), (f"/api/paper/{self.paper.id}/extract_skills/", {})):
+                    response = self.api.post(url, data, format="json")
+                    self.assertEqual(response.status_code, 503)
+                    self.assertIn(str(error), response.data["error"])
+
+    def test_throttled_per_user(self):
+        self.api.force_authenticate(User.objects.create_user("reader"))
+        with mock.patch.dict(ScopedRateThrottle.THROTTLE_RATES, {"extract": "2/min"}):
+            codes = [self.api.post("/api/extract/", {"text": "python"}, format="json").status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+
+
+class CountingEncoder(HashingEncoder):
+    """HashingEncoder that records the size of every encode call."""
+
+    def __init__(self, dim=384):
+        super().__init__(dim)
+        self.calls = []
+
+    def encode(self, sentences, **kwargs):
+        self.calls.append(1 if isinstance(sentences, str) else len(sentences))
+        return super().encode(sentences, **kwargs)
+
+
+SKILLS = ["python programming", "relational databases sql", "protein folding", "deep learning", "music theory"]
+
+
+def stub_extractor(skills=SKILLS, **kwargs):
+    kwargs.setdefault("model", CountingEncoder())
+    return SkillExtractor(skills, model_name="stub", **kwargs)
+
+
+class ExtractBatchTests(TestCase):
+    def setUp(self):
+        self.papers = [
+            Paper.objects.create(title="P1", authors="A", doi="10.1/1", abstract="protein folding predicted by deep learning"),
+            Paper.objects.create(title="P2", authors="A", doi="10.1/2", abstract=""),
+            Paper.objects.create(title="P3", authors="A", doi="10.1/3", abstract="a sql query planner for relational databases"),
+        ]
+
+    def test_one_encode_call_per_batch(self):
+        extractor = stub_extractor()
+        extractor.model.calls.clear()
+
+        results = extractor.extract_batch(self.papers, top_k=2, save_to_db=False)
+
+        self.assertEqual(extractor.model.calls, [2])  # the paper without an abstract is skipped
+        self.assertEqual(results[1], [])
+        self.assertEqual(results[0][0]["skill_name"], "protein folding")
+        self.assertEqual(results[2][0]["skill_name"], "relational databases sql")
+        for paper, rows in zip(self.papers, results):
+            self.assertEqual([r["paper_id"] for r in rows], [paper.id] * len(rows))
+            confidences = [r["confidence"] for r in rows]
+            self.assertEqual(confidences, sorted(confidences, reverse=True))
+        self.assertFalse(ExtractedSkill.objects.exists())
+
+    def test_min_confidence_and_save(self):
+        extractor = stub_extractor()
+
+        results = extractor.extract_batch(self.papers, top_k=5, min_confidence=0.3)
+
+        self.assertTrue(all(r["confidence"] >= 0.3 for rows in results for r in rows))
+        self.assertEqual(ExtractedSkill.objects.count(), sum(len(rows) for rows in results))
+        self.assertEqual(extractor.extract_from_text(self.papers[1]), [])
+
+
+class ExtractedSkillWriterTests(TestCase):
+    def setUp(self):
+        self.papers = [Paper.objects.create(title=f"P{i}", authors="A", doi=f"10.1/{i}") for i in range(3)]
+
+    def test_flushes_every_n_papers(self):
+        writer = ExtractedSkillWriter(flush_every=2, update_profiles=False)
+        writer.add([skill_rows(self.papers[0], {"a": 0.5, "b": 0.4})])
+        self.assertEqual(ExtractedSkill.objects.count(), 0)
+
+        writer.add([skill_rows(self.papers[1], {"a": 0.5}), []])
+        self.assertEqual(ExtractedSkill.objects.count(), 3)
+
+        with writer:
+            writer.add([skill_rows(self.papers[2], {"c": 0.1})])
+        self.assertEqual(writer.written, 4)
+        self.assertEqual(ExtractedSkill.objects.count(), 4)
+
+    def test_replace_only_touches_the_same_paper_and_model(self):
+        with ExtractedSkillWriter(update_profiles=False) as writer:
+            writer.add([
+                skill_rows(self.papers[0], {"old": 0.5}),
+                skill_rows(self.papers[0], {"other model": 0.5}, model="other"),
+                skill_rows(self.papers[1], {"kept": 0.5}),
+            ])
+
+        with ExtractedSkillWriter(replace=True, update_profiles=False) as writer:
+            writer.add([skill_rows(self.papers[0], {"new": 0.9})])
+
+        rows = set(ExtractedSkill.objects.values_list("paper_id", "embedding_model", "skill_name"))
+        self.assertEqual(rows, {
+            (self.papers[0].id, "test-model", "new"),
+            (self.papers[0].id, "other", "other model"),
+            (self.papers[1].id, "test-model", "kept"),
+        })
+
+    def test_without_replace_rows_accumulate(self):
+        for _ in range(2):
+            with ExtractedSkillWriter(update_profiles=False) as writer:
+                writer.add([skill_rows(self.papers[0], {"a": 0.5})])
+        self.assertEqual(ExtractedSkill.objects.count(), 2)
+
+
+class SkillEmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_second_build_is_a_hit_without_encoding(self):
+        first = stub_extractor(cache=SkillEmbeddingCache(self.tmp.name))
+        self.assertEqual((first.cache.stats(), first.model.calls), ({"hits": 0, "misses": 1}, [len(SKILLS)]))
+
+        second = stub_extractor(cache=SkillEmbeddingCache(self.tmp.name))
+        self.assertEqual((second.cache.stats(), second.model.calls), ({"hits": 1, "misses": 0}, []))
+        self.assertEqual(second.skill_embeddings.tolist(), first.skill_embeddings.tolist())
+        self.assertEqual(len(second.cache.entries()), 1)
+
+    def test_key_follows_model_labels_and_file(self):
+        cache = SkillEmbeddingCache(self.tmp.name)
+        key = cache.key("m", ["Python  Programming", "SQL"])
+
+        self.assertEqual(key, cache.key("m", ["python programming", "sql"]))
+        self.assertNotEqual(key, cache.key("other", ["python programming", "sql"]))
+        self.assertNotEqual(key, cache.key("m", ["python programming"]))
+
+        skills_file = os.path.join(self.tmp.name, "skills.csv")
+        with open(skills_file, "w", encoding="utf-8") as f:
+            f.write("skill\npython programming\nsql\n")
+        file_key = cache.key("m", ["python programming", "sql"], skills_file)
+        with open(skills_file, "a", encoding="utf-8") as f:
+            f.write("# edited\n")
+        self.assertNotEqual(file_key, cache.key("m", ["python programming", "sql"], skills_file))
+
+    def test_clear(self):
+        stub_extractor(cache=SkillEmbeddingCache(self.tmp.name))
+        cache = SkillEmbeddingCache(self.tmp.name)
+        self.assertEqual(cache.clear(), 2)  # .npy + .json
+        self.assertEqual(cache.entries(), [])
+
+
+class PaperEmbeddingStoreTests(TestCase):
+    def test_reuses_stored_vectors_until_the_abstract_changes(self):
+        papers = [
+            Paper.objects.create(title="P1", authors="A", doi="10.1/1", abstract="deep learning for protein folding"),
+            Paper.objects.create(title="P2", authors="A", doi="10.1/2", abstract="music theory"),
+        ]
+        extractor = stub_extractor()
+        extractor.paper_store = PaperEmbeddingStore(extractor.model_name)
+        extractor.model.calls.clear()
+
+        first = extractor.extract_batch(papers, save_to_db=False)
+        self.assertEqual(extractor.model.calls, [2])
+
+        second = extractor.extract_batch(papers, save_to_db=False)
+        self.assertEqual(extractor.model.calls, [2])  # nothing new encoded
+        self.assertEqual(
+            [[r["skill_name"] for r in rows] for rows in second],
+            [[r["skill_name"] for r in rows] for rows in first],
+        )
+
+        papers[1].abstract = "relational databases sql"
+        papers[1].save()
+        third = extractor.extract_batch(papers, save_to_db=False)
+        self.assertEqual(extractor.model.calls, [2, 1])
+        self.assertEqual(third[1][0]["skill_name"], "relational databases sql")
+        self.assertEqual(extractor.paper_store.stats(), {"hits": 3, "misses": 3, "stale": 1})
+
+    def test_vectors_are_per_model(self):
+        paper = Paper.objects.create(title="P1", authors="A", doi="10.1/1", abstract="music theory")
+        PaperEmbeddingStore("a").put_many([paper], HashingEncoder().encode(["music theory"]))
+
+        self.assertEqual(set(PaperEmbeddingStore("a").get_many([paper])), {paper.id})
+        self.assertEqual(PaperEmbeddingStore("b").get_many([paper]), {})
+
+
+class ShardedExtractionTests(TransactionTestCase):
+    # workers are spawned processes that read the papers through their own connections
+    databases = {"default"}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.skills_file = os.path.join(self.tmp.name, "skills.csv")
+        with open(self.skills_file, "w", encoding="utf-8") as f:
+            f.write("skill_name\n" + "\n".join(SKILLS) + "\n")
+        abstracts = ["protein folding", "sql databases", "deep learning music", "python", "music theory class", "relational sql"]
+        for i, abstract in enumerate(abstracts):
+            Paper.objects.create(title=f"P{i}", authors="A", doi=f"10.1/{i}", abstract=abstract)
+
+    def test_shard_bounds_cover_every_paper_once(self):
+        ids = list(Paper.objects.order_by("id").values_list("id", flat=True))
+        bounds = shard_bounds(Paper.objects.all(), 4)
+
+        self.assertEqual(len(bounds), 4)
+        covered = [i for i in ids for lo, hi in bounds if i >= lo and (hi is None or i < hi)]
+        self.assertEqual(covered, ids)
+        self.assertEqual(len(shard_bounds(Paper.objects.filter(id=ids[0]), 4)), 1)
+
+    def test_workers_match_a_single_process_run(self):
+        cache = SkillEmbeddingCache(self.tmp.name)
+        taxonomy = load_taxonomy(self.skills_file, alt_labels=False)
+        extractor = SkillExtractor(taxonomy, model_name="stub", skills_file=self.skills_file, cache=cache, model=HashingEncoder())
+        expected = extractor.extract_batch(list(Paper.objects.order_by("id")), top_k=2, save_to_db=False)
+
+        options = {
+            "skills_file": self.skills_file, "model_name": "stub", "embedding_model": "stub", "backend": "torch",
+            "cache_dir": cache.cache_dir, "use_store": False, "author_name": None, "top_k": 2, "batch_size": 2,
+            "search": "exact", "min_confidence": None, "skill_embedding": "label", "model": HashingEncoder(),
+        }
+        writer = ExtractedSkillWriter(update_profiles=False)
+        # spawned workers configure Django from scratch; point them at the test database
+        with mock.patch.dict(os.environ, {"SQLITE_PATH": str(connections["default"].settings_dict["NAME"])}), writer:
+            processed = extract_sharded(Paper.objects.all(), 2, options, writer)
+
+        self.assertEqual(processed, 6)
+        self.assertEqual(
+            set(ExtractedSkill.objects.values_list("paper_id", "skill_name")),
+            {(r["paper_id"], r["skill_name"]) for rows in expected for r in rows},
+        )
+
+
+class SavePapersTests(TestCase):
+    def record(self, doi, **fields):
+        return {"doi": doi, "title": f"Paper {doi}", "authors": "Ada Lovelace, Alan Turing", "year": 2024, **fields}
+
+    def test_inserts_new_papers_with_author_links(self):
+        created = save_papers([
+            self.record("10.1/a", abstract="first"),
+            self.record("10.1/b", authors="alan  TURING, Grace Hopper"),
+            {"doi": None, "title": "no doi", "authors": ""},
+        ])
+
+        self.assertEqual(created, (2, 0))
+        a = Paper.objects.get(doi="10.1/a")
+        self.assertEqual(a.abstract_hash, abstract_hash("first"))
+        self.assertEqual(Author.objects.count(), 3)  # "alan  TURING" is the same author
+        self.assertEqual(
+            list(PaperAuthor.objects.filter(paper=a).order_by("position").values_list("author__name_key", flat=True)),
+            ["ada lovelace", "alan turing"],
+        )
+        self.assertEqual(Author.objects.get(name_key="alan turing").authorships.count(), 2)
+
+    def test_existing_papers_are_only_updated_when_asked(self):
+        save_papers([self.record("10.1/a", abstract="old", citation_count=1)])
+
+        self.assertEqual(save_papers([self.record("10.1/a", abstract="new", citation_count=5)]), (0, 0))
+        self.assertEqual(Paper.objects.get(doi="10.1/a").abstract, "old")
+
+        result = save_papers(
+            [self.record("10.1/a", abstract="new", citation_count=5, fields_of_study=""), self.record("10.1/b")],
+            update_existing=True,
+        )
+        self.assertEqual(result, (1, 1))
+        paper = Paper.objects.get(doi="10.1/a")
+        self.assertEqual((paper.abstract, paper.citation_count, paper.abstract_hash), ("new", 5, abstract_hash("new")))
+
+        # an empty enrichment result never overwrites stored data
+        self.assertEqual(save_papers([self.record("10.1/a", abstract=None, citation_count=5)], update_existing=True), (0, 0))
+        self.assertEqual(Paper.objects.get(doi="10.1/a").abstract, "new")
+
+
+class IngestCheckpointTests(TestCase):
+    params = {"query": "x", "rows": 2}
+
+    def test_resume_keeps_progress_and_a_new_run_resets_it(self):
+        job = start_ingest_job(self.params)
+        checkpoint_ingest_job(job, "c1", 2, 2, ["10.1/a"])
+        job.status = "failed"
+        job.save()
+
+        resumed = start_ingest_job(self.params, resume=True)
+        self.assertEqual(
+            (resumed.id, resumed.cursor, resumed.pages_done, resumed.items_seen, resumed.status),
+            (job.id, "c1", 1, 2, "running"),
+        )
+        self.assertEqual(already_enriched(resumed, ["10.1/a", "10.1/b"]), {"10.1/a"})
+
+        restarted = start_ingest_job(self.params)
+        self.assertEqual((restarted.id, restarted.cursor, restarted.pages_done), (job.id, "*", 0))
+        self.assertEqual(already_enriched(restarted, ["10.1/a"]), set())
+
+
+class FlakyCrossRefSession(StubCrossRefSession):
+    """Pages of two CrossRef works each; the first request for a cursor in `fail` gets a 400."""
+
+    def __init__(self, pages, fail=()):
+        super().__init__([
+            [{"DOI": doi, "title": [f"Title {doi}"], "author": [{"given": "Ada", "family": "Lovelace"}]} for doi in page]
+            for page in pages
+        ])
+        self.fail = set(fail)
+
+    def request(self, method, url, timeout=None, params=None, **kwargs):
+        if params["cursor"] in self.fail:
+            self.fail.discard(params["cursor"])
+            self.cursors.append(params["cursor"])
+            return StubResponse({}, status_code=400)
+        return super().request(method, url, timeout=timeout, params=params, **kwargs)
+
+
+class FetchPapersResumeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubS2Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.s2_url = f"http://127.0.0.1:{cls.server.server_port}/graph/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def fetch(self, session, **options):
+        StubS2Handler.requests_seen = []
+        StubS2Handler.fail_first = 0
+        client = functools.partial(CrossRefClient, session=session, rate=1000, retries=0)
+        with mock.patch("api.management.commands.fetch_papers.CrossRefClient", client):
+            call_command(
+                "fetch_papers", query="x", rows=2, no_cache=True, s2_url=self.s2_url, s2_rate=1000,
+                stdout=StringIO(), stderr=StringIO(), **options,
+            )
+        return sorted(doi for ids in StubS2Handler.requests_seen for doi in ids)
+
+    def test_resume_continues_from_the_saved_cursor(self):
+        session = FlakyCrossRefSession([["10.9/1", "10.9/2"], ["10.9/3", "10.9/4"], ["10.9/5"]], fail={"c1"})
+
+        enriched = self.fetch(session)
+        job = IngestJob.objects.get()
+        self.assertEqual((job.status, job.cursor, job.pages_done, job.saved_count), ("failed", "c1", 1, 2))
+        self.assertEqual(enriched, ["DOI:10.9/1", "DOI:10.9/2"])
+
+        enriched = self.fetch(session, resume=True)
+        job.refresh_from_db()
+        self.assertEqual(session.cursors, ["*", "c1", "c1", "c2"])
+        self.assertEqual((job.status, job.pages_done, job.saved_count), ("completed", 3, 5))
+        self.assertEqual(enriched, ["DOI:10.9/3", "DOI:10.9/4", "DOI:10.9/5"])
+        self.assertEqual(Paper.objects.count(), 5)
+
+
+class SkillSearchTests(SimpleTestCase):
+    def setUp(self):
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        self.skills = rng.standard_normal((300, 32)).astype(np.float32)
+        self.queries = rng.standard_normal((20, 32)).astype(np.float32)
+
+    def test_exact_matches_a_brute_force_scan(self):
+        import numpy as np
+
+        exact = build_skill_search("exact", self.skills)
+        scores, indices = exact.search(self.queries, 5)
+
+        normalized = self.skills / np.linalg.norm(self.skills, axis=1, keepdims=True)
+        expected = np.argsort(-(self.queries / np.linalg.norm(self.queries, axis=1, keepdims=True)) @ normalized.T, axis=1)[:, :5]
+        self.assertEqual(indices, expected.tolist())
+        self.assertTrue(all(row == sorted(row, reverse=True) for row in scores))
+
+        cut_scores, cut_indices = exact.search(self.queries, 5, min_confidence=0.3)
+        self.assertTrue(all(s >= 0.3 for row in cut_scores for s in row))
+        self.assertEqual([len(s) for s in cut_scores], [len(i) for i in cut_indices])
+        self.assertEqual(len(exact.search(self.queries[:1], 1000)[1][0]), 300)  # k is capped at the taxonomy size
+
+    def test_hnsw_recall_and_persisted_index(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        index_path = os.path.join(tmp.name, "skills.hnsw")
+        exact = build_skill_search("exact", self.skills)
+        hnsw = build_skill_search("hnsw", self.skills, index_path=index_path)
+
+        self.assertGreaterEqual(recall_at_k(exact, hnsw, self.queries, 5), 0.95)
+        self.assertEqual(recall_at_k(exact, exact, self.queries, 5), 1.0)
+        self.assertTrue(os.path.exists(index_path))
+        reloaded = build_skill_search("hnsw", self.skills, index_path=index_path)
+        self.assertEqual(reloaded.search(self.queries, 5)[1], hnsw.search(self.queries, 5)[1])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            build_skill_search("faiss", self.skills)
+
+    def test_search_recall_short_cuts(self):
+        exact = stub_extractor()
+        exact.model.calls.clear()
+        self.assertEqual(exact.search_recall([Paper(id=1, abstract="python")]), 1.0)
+        self.assertEqual(exact.model.calls, [])  # nothing to compare an exact scan against
+
+        hnsw = stub_extractor(search="hnsw", paper_store=PaperEmbeddingStore("stub"))
+        self.assertEqual(hnsw.search_recall([Paper(id=1, abstract="")]), 1.0)
+
+
+class AuthorLookupTests(TransactionTestCase):
+    databases = {"default", "read"}
+
+    def setUp(self):
+        self.api = APIClient()
+        save_papers([
+            {"doi": "10.1/a", "title": "A", "authors": "Ada  Lovelace, Charles Babbage", "year": 2020},
+            {"doi": "10.1/b", "title": "B", "authors": "ada lovelace", "year": 2021},
+            {"doi": "10.1/c", "title": "C", "authors": "Ada Lovelace-Byron", "year": 2022},
+        ])
+
+    def test_by_author_matches_the_normalized_name_exactly(self):
+        response = self.api.get("/api/paper/by_author/", {"author": " ADA lovelace "}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # no substring match on "Ada Lovelace-Byron"
+        self.assertEqual([p["doi"] for p in response.data["results"]], ["10.1/a", "10.1/b"])
+        self.assertEqual(self.api.get("/api/paper/by_author/", format="json").status_code, 400)
+
+    def test_author_name_filter(self):
+        response = self.api.get("/api/author/", {"name": "charles   BABBAGE"}, format="json")
+        self.assertEqual([a["name"] for a in response.data["results"]], ["Charles Babbage"])
+        self.assertEqual(Author.objects.count(), 3)  # both spellings of Ada Lovelace share one row
+
+    def test_lookup_uses_the_author_indexes(self):
+        plan = Paper.objects.filter(authorships__author__name_key="ada lovelace").explain()
+        self.assertNotIn("SCAN api_paperauthor", plan)
+        self.assertNotIn("SCAN api_author", plan)
+
+    def test_api_writes_are_linked_and_relinked(self):
+        self.api.force_authenticate(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        created = self.api.post("/api/paper/", {
+            "doi": "10.1/d", "title": "D", "authors": "Grace Hopper, Alan  Turing", "year": 2023,
+        }, format="json")
+        self.assertEqual(created.status_code, 201)
+
+        def by_author(name):
+            return [p["doi"] for p in self.api.get("/api/paper/by_author/", {"author": name}, format="json").data["results"]]
+
+        self.assertEqual(by_author("alan turing"), ["10.1/d"])
+        updated = self.api.patch(f"/api/paper/{created.data['id']}/", {"authors": "Grace Hopper, Ada Lovelace"}, format="json")
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(by_author("alan turing"), [])  # the stale link is dropped
+        self.assertEqual(by_author("Ada Lovelace"), ["10.1/a", "10.1/b", "10.1/d"])
+        self.assertEqual(
+            list(PaperAuthor.objects.filter(paper_id=created.data["id"]).order_by("position").values_list("author__name", flat=True)),
+            ["Grace Hopper", "Ada  Lovelace"],
+        )
+
+
+class PaperListingTests(TransactionTestCase):
+    databases = {"default", "read"}
+
+    def setUp(self):
+        self.api = APIClient()
+        save_papers([
+            {"doi": f"10.1/{i}", "title": f"Paper {i}", "authors": "Ada Lovelace", "year": 2015 + i, "abstract": "x" * 100}
+            for i in range(7)
+        ])
+
+    def test_cursor_pages_cover_every_paper_once(self):
+        dois, url, pages = [], "/api/paper/?page_size=3", 0
+        while url:
+            response = self.api.get(url, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)  # keyset pagination never counts the table
+            dois += [p["doi"] for p in response.data["results"]]
+            url, pages = response.data["next"], pages + 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(dois, [f"10.1/{i}" for i in range(7)])
+
+    def test_sparse_fields_skip_unrequested_columns(self):
+        with CaptureQueriesContext(connections["read"]) as queries:
+            response = self.api.get("/api/paper/", {"fields": "doi,year,bogus"}, format="json")
+        self.assertEqual(set(response.data["results"][0]), {"doi", "year"})
+        select = next(q["sql"] for q in queries.captured_queries if 'FROM "api_paper"' in q["sql"])
+        self.assertNotIn('"abstract"', select)
+
+    def test_export_streams_ndjson(self):
+        response = self.api.get("/api/paper/export/", {"fields": "doi,year", "start_year": 2019})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{"doi": f"10.1/{i}", "year": 2015 + i} for i in range(4, 7)])
+        self.assertEqual(self.api.get("/api/paper/export/", {"end_year": "soon"}).status_code, 400)
+
+
+class FailingEncoder(CountingEncoder):
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, list) and len(sentences) and "fail" in sentences[0]:
+            raise RuntimeError("encoder blew up")
+        return super().encode(sentences, **kwargs)
+
+
+class ExtractionPipelineTests(TransactionTestCase):
+    # the reader and writer stages run on their own threads and connections
+    def setUp(self):
+        abstracts = ["protein folding with deep learning", "", "sql for relational databases", "python programming tips", "music theory"]
+        self.papers = [
+            Paper.objects.create(title=f"P{i}", authors="A", doi=f"10.1/{i}", abstract=abstract)
+            for i, abstract in enumerate(abstracts)
+        ]
+
+    def test_matches_a_direct_extract_batch(self):
+        extractor = stub_extractor()
+        expected = extractor.extract_batch(self.papers, top_k=2, save_to_db=False)
+        writer = ExtractedSkillWriter(flush_every=2)
+
+        pipeline = ExtractionPipeline(extractor, writer, batch_size=2, queue_size=1, top_k=2)
+        self.assertEqual(pipeline.run(Paper.objects.all()), len(self.papers))
+
+        stored = sorted(ExtractedSkill.objects.values_list("paper_id", "skill_name"))
+        self.assertEqual(stored, sorted((r["paper_id"], r["skill_name"]) for rows in expected for r in rows))
+        self.assertEqual([s["items"] for s in pipeline.report()], [5, 5, 5])
+
+    def test_encoder_error_stops_every_stage(self):
+        Paper.objects.filter(id=self.papers[2].id).update(abstract="fail here")
+        pipeline = ExtractionPipeline(stub_extractor(model=FailingEncoder()), ExtractedSkillWriter(), batch_size=2, top_k=2)
+        with self.assertRaisesMessage(RuntimeError, "encoder blew up"):
+            pipeline.run(Paper.objects.all())
+        self.assertFalse(ExtractedSkill.objects.exists())  # the writer never flushes after a failure
+
+    def test_run_job_records_counts(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        skills_file = os.path.join(tmp.name, "skills.csv")
+        with open(skills_file, "w") as f:
+            f.write("\n".join(["skill", *SKILLS]))
+        ExtractionJob.objects.create(kind="years", top_k=2)
+        with override_settings(SKILL_EXTRACTION={**settings.SKILL_EXTRACTION, "SKILLS_FILE": skills_file}):
+            job = run_job(claim_job("w1"), stub_extractor(), batch_size=2)
+
+        self.assertEqual((job.status, job.error), ("completed", ""))
+        self.assertEqual((job.total_papers, job.processed_papers), (4, 4))  # the empty abstract is not queued
+        self.assertEqual(job.skills_written, ExtractedSkill.objects.count())
+        self.assertEqual(job.embedding_model, "stub")
+
+
+class ModelBackendTests(SimpleTestCase):
+    def test_model_tag_keeps_backends_apart(self):
+        self.assertEqual(model_tag("all-MiniLM-L6-v2"), "all-MiniLM-L6-v2")
+        self.assertEqual(model_tag("all-MiniLM-L6-v2", "int8"), "all-MiniLM-L6-v2+int8")
+        self.assertEqual(stub_extractor(backend="onnx").model_name, "stub+onnx")
+
+    def test_unknown_backend(self):
+        with self.assertRaisesMessage(ValueError, "unknown model backend: fp16"):
+            load_model("all-MiniLM-L6-v2", "fp16")
+
+    def test_topk_agreement(self):
+        texts = ["protein folding with deep learning", "sql for relational databases", "python programming"]
+        reference = stub_extractor()
+        self.assertEqual(topk_agreement(reference, stub_extractor(), texts, top_k=2), 1.0)
+        self.assertEqual(topk_agreement(reference, stub_extractor(skills=["knitting", "gardening"]), texts, top_k=2), 0.0)
+        # only the skills both lists share can agree
+        partial = topk_agreement(reference, stub_extractor(skills=SKILLS[:2] + ["knitting", "gardening", "sailing"]), texts, top_k=5)
+        self.assertAlmostEqual(partial, 2 / 5)
+        self.assertEqual(topk_agreement(reference, reference, []), 1.0)
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   _io",
+            "import time:       300 |        400 | encodings",
+            "import time:        50 |         50 |     encodings.aliases",
+            "some other stderr line",
+            "import time:      1000 |       2500 | numpy",
+        ])
+        cumulative, total = parse_importtime(stderr)
+        self.assertEqual(cumulative, {"_io": 100, "encodings": 400, "encodings.aliases": 50, "numpy": 2500})
+        self.assertEqual(total, 2900)  # top-level imports only
+
+    def test_web_and_command_imports_stay_light(self):
+        # fresh interpreters, so the modules this test process already loaded do not hide an eager import
+        out = StringIO()
+        call_command("import_time", only="api views,extract_skills command,wsgi app", repeat=1, json=True, stdout=out)
+        for name, result in json.loads(out.getvalue()).items():
+            self.assertNotIn("error", result, name)
+            self.assertEqual(result["heavy_modules"], {}, name)
+
+
+class SkillTaxonomyTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_esco_csv(self):
+        path = self.write("skills.csv", (
+            "conceptUri,preferredLabel,altLabels\n"
+            'http://esco/1,Python Programming,"python coding\npython programming\nPython Programming"\n'
+            "http://esco/2,  python  programming ,duplicate\n"
+            ",,\n"
+            "http://esco/3,Music Theory,harmony|counterpoint\n"
+        ))
+        taxonomy = load_taxonomy(path)
+
+        self.assertEqual(list(taxonomy), ["Python Programming", "Music Theory"])
+        self.assertEqual(taxonomy.uris, ["http://esco/1", "http://esco/3"])
+        self.assertEqual(taxonomy.duplicates, 1)
+        # alt labels equal to the preferred label are dropped
+        self.assertEqual(taxonomy.alt_labels_of(0), ["python coding"])
+        self.assertEqual(taxonomy.alt_labels_of(1), ["harmony", "counterpoint"])
+        self.assertEqual(load_taxonomy(path, alt_labels=False).alt_labels, [])
+
+    def test_json_array_is_streamed_and_jsonl_accepted(self):
+        records = [{"skill_name": f"skill {i}", "URI": f"u{i}", "alt_labels": [f"alt {i}"]} for i in range(50)]
+        with open(self.write("skills.json", json.dumps(records, indent=1))) as f:
+            self.assertEqual(list(iter_json_records(f, chunk_size=7)), records)
+
+        as_array = load_taxonomy(os.path.join(self.dir, "skills.json"))
+        as_lines = load_taxonomy(self.write("skills.jsonl", "\n".join(json.dumps(r) for r in records)))
+        for taxonomy in (as_array, as_lines):
+            self.assertEqual(len(taxonomy), 50)
+            self.assertEqual((taxonomy[49], taxonomy.uris[49], taxonomy.alt_labels_of(49)), ("skill 49", "u49", ["alt 49"]))
+
+    def test_bad_files(self):
+        with self.assertRaises(FileNotFoundError):
+            load_taxonomy(os.path.join(self.dir, "missing.csv"))
+        with self.assertRaises(ValueError):
+            load_taxonomy(self.write("skills.xlsx", ""))
+        with self.assertRaises(ValueError):
+            load_taxonomy(self.write("names.csv", "name\nPython\n"))
+        with self.assertRaises(ValueError):
+            load_taxonomy(self.write("broken.json", '[{"label": "a"}, {"label": '))
+
+    def test_mean_embeddings(self):
+        import numpy as np
+
+        taxonomy = load_taxonomy(self.write("skills.csv", "label,alt_labels\nsql,databases|queries\npython,\nmusic,harmony\n"))
+        encoder = HashingEncoder(dim=16)
+        means = taxonomy.mean_embeddings(lambda texts: encoder.encode(texts), chunk_size=2)
+
+        expected = np.mean(encoder.encode(["sql", "databases", "queries"]), axis=0)
+        np.testing.assert_allclose(means[0], expected / np.linalg.norm(expected), rtol=1e-5)
+        np.testing.assert_allclose(means[1], encoder.encode(["python"])[0] / np.linalg.norm(encoder.encode(["python"])[0]), rtol=1e-5)
+        self.assertEqual(means.shape, (3, 16))
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = metrics.MetricsRegistry()
+
+    def test_prometheus_text(self):
+        self.registry.inc("http_requests_total", host="api.crossref.org", status=200)
+        self.registry.inc("http_requests_total", 2, host="api.crossref.org", status=200)
+        self.registry.set("pipeline_utilization", 0.5, stage='say "hi"\n')
+        for value in (0.003, 0.02, 0.02, 100):
+            self.registry.observe("db_write_seconds", value, table="paper")
+
+        lines = self.registry.render_prometheus().splitlines()
+        self.assertIn("# TYPE http_requests_total counter", lines)
+        self.assertIn('http_requests_total{host="api.crossref.org",status="200"} 3', lines)
+        self.assertIn('pipeline_utilization{stage="say \\"hi\\"\\n"} 0.5', lines)
+        self.assertIn("# TYPE db_write_seconds histogram", lines)
+        # buckets are cumulative and end with +Inf = count
+        self.assertIn('db_write_seconds_bucket{table="paper",le="0.005"} 1', lines)
+        self.assertIn('db_write_seconds_bucket{table="paper",le="0.01"} 1', lines)
+        self.assertIn('db_write_seconds_bucket{table="paper",le="0.025"} 3', lines)
+        self.assertIn('db_write_seconds_bucket{table="paper",le="60.0"} 3', lines)
+        self.assertIn('db_write_seconds_bucket{table="paper",le="+Inf"} 4', lines)
+        self.assertIn('db_write_seconds_count{table="paper"} 4', lines)
+
+    def test_snapshot(self):
+        with self.registry.timer("embedding_batch_seconds", model="m"):
+            pass
+        self.registry.observe("embedding_batch_seconds", 1.0, model="m")
+        self.registry.inc("papers_extracted_total", 5, model="m")
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["counters"], {'papers_extracted_total{model="m"}': 5})
+        histogram = snapshot["histograms"]['embedding_batch_seconds{model="m"}']
+        self.assertEqual(histogram["count"], 2)
+        self.assertAlmostEqual(histogram["mean"], histogram["sum"] / 2, places=5)
+
+    def test_instrument_command_writes_stats_and_profile(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        stats_path, profile_path = os.path.join(tmp.name, "stats.json"), os.path.join(tmp.name, "run.prof")
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+        with metrics.instrument_command(stats_path, profile_path):
+            metrics.inc("db_rows_written_total", 7, table="paper")
+
+        with open(stats_path) as f:
+            stats = json.load(f)
+        self.assertEqual(stats["counters"], {'db_rows_written_total{table="paper"}': 7})
+        self.assertIn("wall_seconds", stats)
+        self.assertGreater(os.path.getsize(profile_path), 0)
+
+        out = StringIO()
+        with metrics.instrument_command("-", stdout=out):
+            pass
+        self.assertEqual(json.loads(out.getvalue())["counters"], stats["counters"])
+
+    def test_metrics_endpoint(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+
+class ExtractionRunTests(TestCase):
+    def setUp(self):
+        self.papers = [
+            Paper.objects.create(title=f"P{i}", authors="A", doi=f"10.1/{i}", abstract=abstract)
+            for i, abstract in enumerate(["protein folding", "sql databases", "music theory"])
+        ]
+
+    def extract(self, extractor, run, papers=None):
+        # what the pipeline hands the writer for each batch
+        papers = papers or list(Paper.objects.order_by("id"))
+        with ExtractedSkillWriter(run=run) as writer:
+            results = extractor.extract_batch(papers, top_k=run.top_k, save_to_db=False)
+            writer.add(results, processed=[(paper.id, paper.abstract_hash) for paper in papers])
+
+    def test_runs_are_keyed_by_configuration(self):
+        fingerprint = skills_fingerprint(skill_list=SKILLS)
+        self.assertEqual(fingerprint, skills_fingerprint(skill_list=[" Python  Programming", *SKILLS[1:]]))
+        self.assertNotEqual(fingerprint, skills_fingerprint(skill_list=SKILLS[:-1]))
+
+        run = get_run("stub", fingerprint, 5)
+        self.assertEqual(get_run("stub", fingerprint, 5).id, run.id)
+        self.assertNotEqual(get_run("stub", fingerprint, 3).id, run.id)
+        self.assertNotEqual(get_run("stub", fingerprint, 5, min_confidence=0.2).id, run.id)
+        self.assertNotEqual(get_run("stub", fingerprint, 5, search="hnsw").id, run.id)
+
+    def test_only_new_or_changed_abstracts_are_pending(self):
+        extractor = stub_extractor()
+        run = run_for_extractor(extractor, 2)
+        self.assertEqual(pending_papers(Paper.objects.all(), run).count(), 3)
+
+        self.extract(extractor, run)
+        self.assertEqual(ExtractedPaper.objects.filter(run=run).count(), 3)
+        self.assertFalse(pending_papers(Paper.objects.all(), run).exists())
+
+        changed = self.papers[1]
+        changed.abstract = "python programming"
+        changed.save()
+        Paper.objects.create(title="P3", authors="A", doi="10.1/3", abstract="deep learning")
+        self.assertEqual(
+            sorted(pending_papers(Paper.objects.all(), run).values_list("doi", flat=True)), ["10.1/1", "10.1/3"]
+        )
+
+        # re-extracting the changed paper replaces its rows and refreshes the marker
+        self.extract(extractor, run, papers=[Paper.objects.get(id=changed.id)])
+        self.assertEqual(ExtractedSkill.objects.filter(paper=changed).first().skill_name, "python programming")
+        self.assertEqual(ExtractedSkill.objects.filter(paper=changed).count(), 2)
+        self.assertEqual(pending_papers(Paper.objects.all(), run).get().doi, "10.1/3")
+
+    def test_new_configuration_takes_over_the_model_rows(self):
+        extractor = stub_extractor()
+        first, second = run_for_extractor(extractor, 2), run_for_extractor(extractor, 1)
+        self.extract(extractor, first)
+        self.assertEqual(pending_papers(Paper.objects.all(), second).count(), 3)
+
+        self.extract(extractor, second)
+        self.assertEqual(ExtractedSkill.objects.count(), 3)  # top-1 rows replaced the top-2 ones
+        self.assertFalse(ExtractedPaper.objects.filter(run=first).exists())
+        self.assertEqual(pending_papers(Paper.objects.all(), first).count(), 3)
@@ -4,9 +4,12 @@ from . import views
 
 router = routers.DefaultRouter()
 router.register(r'paper', views.PaperViewSet)
+router.register(r'author', views.AuthorViewSet)
+router.register(r'jobs', views.ExtractionJobViewSet)
 
 urlpatterns = [
     #path("", views.index, name="index"),
     path('', include(router.urls)),
+    path('extract/', views.ExtractView.as_view(), name='extract'),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
 ]
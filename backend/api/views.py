@@ -1,50 +1,320 @@
 #from django.http import HttpResponse
 
-from rest_framework import viewsets
+import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
-from .serializers import PaperSerializer
-from .models import Paper
-#from .services.skill_matcher import load_skills, extract_skills
+from rest_framework.views import APIView
+from .serializers import (
+    requested_fields, PaperSerializer, ExtractRequestSerializer, AuthorSerializer, AuthorSkillProfileSerializer,
+    ExtractionJobSerializer, ExtractionJobRequestSerializer,
+)
+from .models import Paper, Author, AuthorSkillProfile, ExtractionJob
+from .services import metrics
+from .services.extractor_service import get_batcher, get_extractor
+from .services.ingest import normalize_author_name
+from .services.response_cache import bump_data_version, data_version, response_key
 
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.throttling import ScopedRateThrottle
 
-class PaperViewSet(viewsets.ModelViewSet):
-    queryset = Paper.objects.all().order_by('title')
+# read-only connection alias for GET traffic (falls back to default if it isn't configured)
+READ_DB = 'read' if 'read' in settings.DATABASES else 'default'
+
+
+def rank_or_error(text, params):
+    # returns (skills, None) or (None, error Response)
+    try:
+        skills = get_batcher().rank(
+            text,
+            top_k=params["top_k"],
+            min_confidence=params.get("min_confidence"),
+            timeout=settings.SKILL_EXTRACTION.get("TIMEOUT", 30),
+        )
+    # the extractor loads on first use: missing skills file or model files (OSError), a backend's
+    # packages not installed (ImportError), or a bad configuration (ValueError)
+    except (OSError, ImportError, ValueError) as e:
+        return None, Response({"error": f"Skill extractor is not available: {e}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except FutureTimeoutError:
+        return None, Response({"error": "Skill extraction timed out."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return skills, None
+
+def metrics_view(request):
+    # Prometheus text exposition of this process's counters and histograms
+    return HttpResponse(metrics.registry.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class RequestMetricsMixin:
+    """Records api_request_seconds per endpoint (view.action), method and status code."""
+
+    def dispatch(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        response = super().dispatch(request, *args, **kwargs)
+        # for streamed responses this is the time to the first byte, not the whole body
+        endpoint = f"{self.__class__.__name__}.{getattr(self, 'action', None) or request.method.lower()}"
+        metrics.observe(
+            "api_request_seconds", time.perf_counter() - started,
+            endpoint=endpoint, method=request.method, status=response.status_code,
+        )
+        return response
+
+
+class ReadConnectionMixin:
+    """GET/HEAD/OPTIONS requests query through the READ_DB alias, so they never queue behind a writer's connection."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.using(READ_DB)
+        return queryset
+
+
+class CachedReadMixin:
+    """
+    cached_response() serves a read endpoint from the cache framework, keyed by endpoint, query params and
+    the data version that ingest and extraction bump. The ETag comes from the same key, so a dashboard poll
+    with a matching If-None-Match gets a 304 without touching the database.
+    """
+
+    def cached_response(self, request, build):
+        key = response_key(request, f"{self.__class__.__name__}.{self.action}", data_version())
+        renderer = getattr(request, 'accepted_renderer', None)
+        etag = f'W/"{key.rsplit(":", 1)[-1][:20]}-{getattr(renderer, "format", "")}"'
+
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = build()
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, timeout=settings.API_RESPONSE_CACHE_TIMEOUT)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Cache-Control'] = 'no-cache'  # clients may keep it but must revalidate
+        return response
+
+
+class PaperCursorPagination(CursorPagination):
+    # keyset pagination on the primary key: every page is an index range scan, however deep
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+# Paper model fields that can be exported or selected with ?fields=
+PAPER_EXPORT_FIELDS = ('id', 'title', 'authors', 'year', 'doi', 'venue', 'abstract', 'fields_of_study', 'citation_count', 'url')
+
+
+class PaperViewSet(RequestMetricsMixin, CachedReadMixin, ReadConnectionMixin, viewsets.ModelViewSet):
+    queryset = Paper.objects.all().order_by('id')
     serializer_class = PaperSerializer
+    pagination_class = PaperCursorPagination
+    throttle_scope = None  # set by the extract_skills action; ScopedRateThrottle ignores views without one
     
     #For Development
     #permission_classes = [AllowAny]
-    
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request, PAPER_EXPORT_FIELDS)
+        if fields and self.request.method == 'GET':
+            # sparse fieldsets also skip loading the left-out columns (abstract is the big one)
+            queryset = queryset.only('id', *fields)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(PaperViewSet, self).list(request, *args, **kwargs))
+
+    # writes through the API invalidate cached reads like ingest does
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_data_version()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_data_version()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_data_version()
     
     @action(detail=False, methods=['get'])
     def by_author(self, request):
         author = request.query_params.get('author', None)
         if author is not None:
-            papers = Paper.objects.filter(authors__icontains=author)
-            serializer = self.get_serializer(papers, many=True)
-            return Response(serializer.data)
+            def build():
+                # exact (case/whitespace-insensitive) name through the indexed author tables
+                papers = self.get_queryset().filter(authorships__author__name_key=normalize_author_name(author))
+                page = self.paginate_queryset(papers)
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            return self.cached_response(request, build)
         return Response({"error": "No author specified."}, status=400)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream papers as NDJSON (one object per line); supports ?fields=, ?start_year= and ?end_year=."""
+        fields = requested_fields(request, PAPER_EXPORT_FIELDS) or list(PAPER_EXPORT_FIELDS)
+        papers = Paper.objects.using(READ_DB).order_by('id')
+        start_year = request.query_params.get('start_year')
+        end_year = request.query_params.get('end_year')
+        try:
+            if start_year:
+                papers = papers.filter(year__gte=int(start_year))
+            if end_year:
+                papers = papers.filter(year__lte=int(end_year))
+        except ValueError:
+            return Response({"error": "start_year and end_year must be integers."}, status=400)
+
+        def rows():
+            for row in papers.values(*fields).iterator(chunk_size=2000):
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+
+        response = StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="papers.ndjson"'
+        return response
     
-    """
-    @action(detail=True, methods=['post'])
+    # model inference on demand: signed-in users only, rate limited per user
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated],
+            throttle_classes=[ScopedRateThrottle], throttle_scope='extract')
     def extract_skills(self, request, pk=None):
         paper = self.get_object()
-        text = f"{paper.title}. {paper.abstract or ''}"
+        params = ExtractRequestSerializer(data=request.data, context={"text_required": False})
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        if not paper.abstract:
+            return Response({"error": "Paper has no abstract."}, status=400)
+        if params["save"] and not request.user.has_perm("api.add_extractedskill"):
+            return Response({"error": "Saving skills needs the api.add_extractedskill permission."}, status=403)
+
+        skills, error = rank_or_error(paper.abstract, params)
+        if error is not None:
+            return error
+
+        model_name = get_extractor().model_name
+        if params["save"]:
+            from .services.skill_extraction import ExtractedSkillWriter
 
-        skills = load_skills()  # โหลด ESCO dataset
-        matched = extract_skills(text, skills, threshold=0.7)
+            with ExtractedSkillWriter(replace=True) as writer:
+                writer.add([[
+                    {"paper_id": paper.id, "author_name": None, "model": model_name, **skill}
+                    for skill in skills
+                ]])
 
         return Response({
             "paper_id": paper.id,
             "title": paper.title,
-            "matched_skills": matched
+            "model": model_name,
+            "matched_skills": skills,
         })
+
+
+class ProfilePagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class AuthorViewSet(RequestMetricsMixin, CachedReadMixin, ReadConnectionMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Author.objects.all().order_by('id')
+    serializer_class = AuthorSerializer
+    pagination_class = ProfilePagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        name = self.request.query_params.get('name')
+        if name:
+            queryset = queryset.filter(name_key=normalize_author_name(name))
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def skills(self, request, pk=None):
+        return self.cached_response(request, lambda: self._skills(request))
+
+    def _skills(self, request):
+        # reads the precomputed AuthorSkillProfile rows; ?model= narrows to one embedding model
+        author = self.get_object()
+        profiles = AuthorSkillProfile.objects.using(READ_DB).filter(author=author).order_by('-paper_count', '-mean_confidence', 'skill_name')
+        model_name = request.query_params.get('model')
+        if model_name:
+            profiles = profiles.filter(embedding_model=model_name)
+        page = self.paginate_queryset(profiles)
+        serializer = AuthorSkillProfileSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ExtractView(RequestMetricsMixin, APIView):
+    """POST {"text": ..., "top_k": 5, "min_confidence": null} and get the closest skills back."""
+
+    # model inference on demand: signed-in users only, rate limited per user
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'extract'
+
+    def post(self, request):
+        params = ExtractRequestSerializer(data=request.data, context={"text_required": True})
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        skills, error = rank_or_error(params["text"], params)
+        if error is not None:
+            return error
+        return Response({"model": get_extractor().model_name, "matched_skills": skills})
+
+
+class ExtractionJobViewSet(RequestMetricsMixin, ReadConnectionMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
     """
-    
-    
+    POST {"paper_id": 1} | {"author": "Name or id"} | {"start_year": 2020, "end_year": 2023} (+ top_k, overwrite)
+    queues an extraction for run_extraction_worker and returns 202 right away; GET shows status and progress.
+    """
+
+    queryset = ExtractionJob.objects.all().order_by('-id')
+    serializer_class = ExtractionJobSerializer
+    pagination_class = ProfilePagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        params = ExtractionJobRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        job = ExtractionJob(top_k=params["top_k"], overwrite=params["overwrite"])
+        if "paper_id" in params:
+            job.kind = 'paper'
+            job.paper = Paper.objects.filter(id=params["paper_id"]).first()
+            if job.paper is None:
+                return Response({"error": "Paper not found."}, status=404)
+        elif "author" in params:
+            job.kind = 'author'
+            author = params["author"].strip()
+            authors = Author.objects.filter(id=int(author)) if author.isdigit() else Author.objects.filter(name_key=normalize_author_name(author))
+            job.author = authors.first()
+            if job.author is None:
+                return Response({"error": "Author not found."}, status=404)
+        else:
+            job.kind = 'years'
+            job.start_year = params.get("start_year")
+            job.end_year = params.get("end_year")
+        job.save()
+        return Response(ExtractionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-        
 
 """
 def index(request):
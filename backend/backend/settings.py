@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -74,11 +75,50 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Run on every new SQLite connection. WAL lets readers and one writer work at the same time,
+# synchronous=NORMAL only fsyncs at checkpoints, and busy_timeout makes a second writer wait instead of
+# failing with "database is locked".
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=20000',  # ms
+    'PRAGMA mmap_size=268435456',  # 256 MiB of the file read through mmap
+    'PRAGMA cache_size=-65536',  # 64 MiB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+)
+
+# the bench command points this at a throwaway file in each of its subprocesses
+SQLITE_PATH = os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': SQLITE_PATH,
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'timeout': 20,
+            # take the write lock at BEGIN, so a transaction never fails upgrading from read to write
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # a file rather than in-memory, so tests see WAL and the read alias opens its own connection as in production
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # same file, read-only connection used by GET requests of the API
+    'read': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': SQLITE_PATH,
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS + ('PRAGMA query_only=ON',)),
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
 
@@ -128,5 +168,46 @@ REST_FRAMEWORK = {
     # or allow read-only access for unauthenticated users.
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
-    ]
+    ],
+    # the on-demand extraction endpoints run the model per request
+    'DEFAULT_THROTTLE_RATES': {
+        'extract': os.environ.get('SKILL_EXTRACT_RATE', '60/min'),
+    },
 }
+
+# Skill extraction
+SKILL_EMBEDDING_CACHE_DIR = BASE_DIR / 'cache' / 'skill_embeddings'
+
+# Warm extractor behind the /extract/ and /paper/{id}/extract_skills/ endpoints
+SKILL_EXTRACTION = {
+    'SKILLS_FILE': os.environ.get('SKILLS_FILE', str(BASE_DIR / 'data' / 'skills.csv')),
+    'MODEL': os.environ.get('SKILL_MODEL', 'all-MiniLM-L6-v2'),
+    'SEARCH': 'exact',
+    'BACKEND': os.environ.get('SKILL_BACKEND', 'torch'),  # torch | onnx | int8
+    'SKILL_EMBEDDING': 'label',  # label | mean (label and alt labels averaged)
+    'MAX_BATCH': 32,  # texts per micro-batch
+    'MAX_WAIT_MS': 5,  # how long the first request waits for others to join its batch
+    'TIMEOUT': 30,  # seconds a request waits for its result
+    'RETRY_LOAD_AFTER': 300,  # seconds a failed extractor load is re-raised before it is tried again
+}
+
+# Cached GET responses of the paper and author skill endpoints. File-based so every web worker and
+# management command shares them along with the data version that ingest and extraction bump.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('API_CACHE_DIR', BASE_DIR / 'cache' / 'api'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+API_RESPONSE_CACHE_TIMEOUT = 3600  # seconds; writes invalidate earlier through the data version
+
+# swaps in an in-memory cache for the run and empties it before every test
+TEST_RUNNER = 'backend.test_runner.TestRunner'
+
+# Semantic Scholar per-DOI response cache used by fetch_papers (CrossRef cursor pages expire and are never cached)
+HTTP_CACHE_DIR = BASE_DIR / 'cache' / 'http'
+HTTP_CACHE_TTL = 7 * 24 * 3600  # seconds
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
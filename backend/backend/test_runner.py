@@ -0,0 +1,34 @@
+import unittest
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+class TestRunner(DiscoverRunner):
+    """
+    manage.py test with the cache framework on an in-memory cache, so tests never read or fill the
+    developer's cache/api directory, emptied before every test so no cached response outlives the
+    test database it was built from.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+
+        class Result(base):
+            def startTest(self, test):
+                for cache in caches.all():
+                    cache.clear()
+                super().startTest(test)
+
+        return Result
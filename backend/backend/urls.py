@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from api.views import metrics_view
 
 urlpatterns = [
     path("api/", include("api.urls")),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]